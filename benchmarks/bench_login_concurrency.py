@@ -0,0 +1,157 @@
+"""
+Benchmark of many simultaneous sign-ups, logins and profile updates against the users database.
+
+Compares the former access pattern of login.py, one connection shared by all
+session threads, with the pooled WAL connections of utils.db. Both run the
+same statements on a fresh temporary database. Like a Streamlit rerun, every
+operation of a session runs on a new thread.
+
+Usage:
+    python benchmarks/bench_login_concurrency.py [--users 50] [--logins 20]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db
+
+CREATE_USERS = 'CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password TEXT, remarks TEXT)'
+INSERT_USER = 'INSERT INTO users (username, password, remarks) VALUES (?,?,?)'
+SELECT_USER = 'SELECT * FROM users WHERE username =?'
+UPDATE_REMARKS = 'UPDATE users SET remarks = ? WHERE username = ?'
+UPDATE_PASSWORD = 'UPDATE users SET password = ? WHERE username = ?'
+UPDATE_USER = 'UPDATE users SET remarks = ?, password = ? WHERE username = ?'
+
+
+def make_hashes(password: str) -> str:
+    """Hash a password like login.make_hashes."""
+    return hashlib.sha256(str.encode(password)).hexdigest()
+
+
+class SharedConnection:
+    """The former pattern: one connection with check_same_thread=False for every thread."""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(CREATE_USERS)
+        self.conn.commit()
+
+    def sign_up(self, username: str, password: str):
+        self.conn.cursor().execute(INSERT_USER, (username, make_hashes(password), ""))
+        self.conn.commit()
+
+    def login(self, username: str, password: str) -> bool:
+        cursor = self.conn.cursor()
+        cursor.execute(SELECT_USER, (username, ))
+        data = cursor.fetchone()
+        return bool(data) and data[1] == make_hashes(password)
+
+    def update(self, username: str, password: str, remarks: str):
+        cursor = self.conn.cursor()
+        cursor.execute(UPDATE_REMARKS, (remarks, username))
+        cursor.execute(UPDATE_PASSWORD, (make_hashes(password), username))
+        self.conn.commit()
+
+
+class DataLayer:
+    """The utils.db pattern: pooled WAL connections and one transaction per update."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with db.transaction(path) as conn:
+            conn.execute(CREATE_USERS)
+
+    def sign_up(self, username: str, password: str):
+        with db.transaction(self.path) as conn:
+            conn.execute(INSERT_USER, (username, make_hashes(password), ""))
+
+    def login(self, username: str, password: str) -> bool:
+        data = db.query_one(SELECT_USER, (username, ), path=self.path)
+        return bool(data) and data[1] == make_hashes(password)
+
+    def update(self, username: str, password: str, remarks: str):
+        with db.transaction(self.path) as conn:
+            conn.execute(UPDATE_USER, (remarks, make_hashes(password), username))
+
+
+def session(store, index: int, logins: int, latencies: list, errors: list, lock: threading.Lock):
+    """Simulate one user session: sign up, log in repeatedly and update the profile, one thread per operation."""
+    username, password = f"user{index}", f"secret{index}"
+    steps = [("sign_up", (username, password))]
+    steps += [("login", (username, password))] * logins
+    steps += [("update", (username, password + "!", f"remarks of {username}"))]
+
+    def operation(name: str, args: tuple):
+        started = time.perf_counter()
+        try:
+            getattr(store, name)(*args)
+        except sqlite3.Error as error:
+            with lock:
+                errors.append(f"{name}: {error}")
+            return
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    for name, args in steps:
+        thread = threading.Thread(target=operation, args=(name, args))
+        thread.start()
+        thread.join()
+
+
+def run(store_class, users: int, logins: int) -> dict:
+    """
+    Run all sessions of one access pattern concurrently.
+
+    Args:
+        store_class: SharedConnection or DataLayer
+        users (int): Number of simultaneous sessions
+        logins (int): Logins per session
+
+    Returns:
+        dict: Wall time, throughput, latency percentiles and errors
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        store = store_class(os.path.join(directory, "users.db"))
+        latencies, errors, lock = [], [], threading.Lock()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            for index in range(users):
+                executor.submit(session, store, index, logins, latencies, errors, lock)
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "seconds": elapsed,
+        "ops_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": 1000 * latencies[len(latencies) // 2] if latencies else 0.0,
+        "p99_ms": 1000 * latencies[int(len(latencies) * 0.99)] if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=50, help="simultaneous sessions")
+    parser.add_argument("--logins", type=int, default=20, help="logins per session")
+    args = parser.parse_args()
+
+    for store_class in (SharedConnection, DataLayer):
+        result = run(store_class, args.users, args.logins)
+        print(f"{store_class.__name__:>16}: {result['seconds']:.2f}s, {result['ops_per_second']:.0f} ops/s, "
+              f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, {len(result['errors'])} errors")
+        for error in sorted(set(result["errors"]))[:5]:
+            print(f"{'':>18}{error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import streamlit as st
 import sqlite3
-import hashlib
+
+from utils.user_repository import migrate, add_user, login_user, get_remarks
 
 # st.session_state.sidebar_state = 'collapsed'
 # if 'layout' not in st.session_state:
@@ -22,23 +23,7 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-DB_FILE = 'users.db'
-
-
-@st.cache_resource
-def init_connection():
-  return sqlite3.connect(DB_FILE, check_same_thread=False)
-
-
-def get_cursor():
-  return init_connection().cursor()
-
-
-conn = init_connection()
-c = get_cursor()
-c.execute('''CREATE TABLE IF NOT EXISTS users
-             (username TEXT PRIMARY KEY, password TEXT, remarks TEXT)''')
-conn.commit()
+migrate()
 
 @st.experimental_dialog(title="Sign Up Now")
 def sign_up_page():
@@ -107,60 +92,6 @@ def sign_in_page():
       st.toast("Logging in as Guest")
       st.switch_page("pages/eatdentify.py")
 
-def make_hashes(password):
-  return hashlib.sha256(str.encode(password)).hexdigest()
-
-
-def check_hashes(password, hashed_text):
-  if make_hashes(password) == hashed_text:
-    return True
-  return False
-
-
-def update_user(username):
-  c = get_cursor()
-  c.execute("UPDATE users SET remarks = ? WHERE username = ?",
-            (st.session_state.remarks, username))
-  c.execute("UPDATE users SET password = ? WHERE username = ?",
-            (make_hashes(st.session_state.password), username))
-  conn.commit()
-
-
-def add_user(username, password, remarks):
-  c = get_cursor()
-  c.execute('INSERT INTO users (username, password, remarks) VALUES (?,?,?)',
-            (username, make_hashes(password), remarks))
-  conn.commit()
-
-
-def display_db(username):
-  c = get_cursor()
-  c.execute('SELECT * FROM users WHERE username =?', (username, ))
-  data = c.fetchone()
-  return data[0] if data else None
-
-
-def get_remarks(username):
-  c = get_cursor()
-  c.execute('SELECT remarks FROM users WHERE username =?', (username, ))
-  data = c.fetchone()
-  try:
-    return data[0]
-  except Exception as e:
-    return ""
-
-
-def login_user(username, password):
-  c = get_cursor()
-  c.execute('SELECT * FROM users WHERE username =?', (username, ))
-  data = c.fetchone()
-  # print(f"New Username {username}")
-  # print(f"New Password {password}")
-  # print(f"Stored Password {data[1]}")
-  if data:
-    return check_hashes(password, data[1])
-  return False
-
 def main():
   sign_in_page()
 
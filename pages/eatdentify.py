@@ -5,6 +5,8 @@ import random
 from utils.style import light_theme, dark_theme
 from utils.constants import food_facts
 from utils.data_structures import RestaurantResult
+from utils.llm_api import warm_up_clients
+from utils.user_repository import migrate
 
 from tabs.restaurant import display_restaurant
 from tabs.meal import display_meal
@@ -38,6 +40,11 @@ def main():
     and other session data throughout the user's interaction.
     """
 
+    # Build the shared LLM clients ahead of the first request (no-op after the first run)
+    warm_up_clients()
+    # Bring the users database schema up to date (no-op after the first run)
+    migrate()
+
     if st_theme()['base'] == "light":  
         light_theme()
     else:
@@ -61,8 +68,6 @@ def main():
         "📚 Manual"
     ])
 
-    # lang_chain_bundle = initialize_langchain()
-    # buffer_chain = lang_chain_bundle["buffer_chain"]
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
     if 'username' not in st.session_state:
@@ -76,9 +81,13 @@ def main():
     if 'results' not in st.session_state:
         st.session_state.results = RestaurantResult({}, [])
     
+    # Restaurant cards are streamed here while a search is running
+    with tab1:
+        live_results = st.empty()
+
     # Sidebar for user input
     with st.sidebar:
-        display_sidebar()
+        display_sidebar(live_results)
 
     follow_up = None
 
@@ -4,11 +4,46 @@ import pandas as pd
 
 import matplotlib.pyplot as plt
 import numpy as np
+import json
+import uuid
+import sqlite3
+from itertools import chain
 
 from utils.style import chat_bot
-from utils.prompt import choose_meal, analyse_cuisine, food_bot, nutrition, chart_data_prompt
-from utils.utils import response_imageOpenAI
+from utils.prompt import choose_meal, analyse_cuisine, food_bot, nutrition, chart_data_prompt, nutrition_analysis
+from utils.utils import response_imageOpenAI, stream_imageOpenAI, perceptual_hash, IMAGE_ANALYSIS_FAILED
 from utils.llm_api import get_OpenAI
+from utils.image_cache import ImageAnalysisCache
+from utils.chat_context import RollingSummary, build_chat_context
+from utils.data_structures import NutritionAnalysis
+from utils import chat_store
+from utils.constants import COMBINED_NUTRITION_ANALYSIS, IMAGE_ANALYSIS_CACHE_TTL, IMAGE_ANALYSIS_CACHE_MAX_ENTRIES, CHAT_MODEL, STREAM_CHAT_RESPONSES, CHAT_PAGE_SIZE, CHAT_SESSION_TAIL
+
+MULTIPLE_DISHES_MESSAGE = "Unfortunately, I can't provide a nutrition breakdown for this image because it contains multiple dishes."
+
+# Image analyses shared by all sessions, keyed by perceptual image hash and the full prompt (template and remarks)
+image_analysis_cache = ImageAnalysisCache("image_analysis", ttl=IMAGE_ANALYSIS_CACHE_TTL, max_entries=IMAGE_ANALYSIS_CACHE_MAX_ENTRIES)
+
+# OpenAI structured output constraining the nutrition analysis to NutritionAnalysis
+NUTRITION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "nutrition_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "single_dish": {"type": "boolean"},
+                "report": {"type": "string"},
+                "protein_grams": {"type": "number"},
+                "carbs_grams": {"type": "number"},
+                "fat_grams": {"type": "number"}
+            },
+            "required": ["single_dish", "report", "protein_grams", "carbs_grams", "fat_grams"],
+            "additionalProperties": False
+        }
+    }
+}
 
 
 def food_suggestion_chatbot():
@@ -36,15 +71,11 @@ def food_suggestion_chatbot():
     chat_bot()
 
     # Initialize chat history
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    load_chat_history()
     chat_container = st.container()
 
-    # Display chat messages from history on app rerun
-    with chat_container:
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"], unsafe_allow_html=True)
+    # Display the most recent chat messages from history on app rerun
+    display_chat_history(chat_container)
 
     df = None
     prompt = st.chat_input("What would you like to know about food?",
@@ -85,18 +116,24 @@ def food_suggestion_chatbot():
                         msg = choose_meal + "Choose the meal based on the remarks: " + st.session_state.user_remarks
                     else:
                         msg = choose_meal
-                    analysis = analyze_food_image(st.session_state.image, msg)
-                    message = f"Based on the image you uploaded: \n{analysis}"
-                    append_message(chat_container, "assistant", message)
+                    if STREAM_CHAT_RESPONSES:
+                        stream_message(chat_container, "assistant", chain(["Based on the image you uploaded: \n"], analyze_food_image_stream(st.session_state.image, msg)))
+                    else:
+                        analysis = analyze_food_image(st.session_state.image, msg)
+                        message = f"Based on the image you uploaded: \n{analysis}"
+                        append_message(chat_container, "assistant", message)
 
             # recipe button
             if col2.button("Ask for recipe", use_container_width=True):
                 with st.spinner("Analyzing Cuisine..."):
                     msg = analyse_cuisine + remarks_prompt
-                    cuisine_analysis = analyze_food_image(
-                        st.session_state.image, msg)
-                    message = f"Cuisine Analysis: \n{cuisine_analysis}"
-                    append_message(chat_container, "assistant", message)
+                    if STREAM_CHAT_RESPONSES:
+                        stream_message(chat_container, "assistant", chain(["Cuisine Analysis: \n"], analyze_food_image_stream(st.session_state.image, msg)))
+                    else:
+                        cuisine_analysis = analyze_food_image(
+                            st.session_state.image, msg)
+                        message = f"Cuisine Analysis: \n{cuisine_analysis}"
+                        append_message(chat_container, "assistant", message)
 
             # nutrition button
             if col3.button("Analyze Nutrition", use_container_width=True):
@@ -116,12 +153,19 @@ def food_suggestion_chatbot():
         with st.spinner("Thinking..."):
             if st.session_state.image is not None:
                 input = f"Strictly based on the image, assist me with: {prompt}. don't make up information and don't ever mention the image. Don't tell that you can or cannot identify the image if not asked something related to the image." + remarks_prompt
-                response = analyze_food_image(st.session_state.image, input)
+                if STREAM_CHAT_RESPONSES:
+                    stream_message(chat_container, "assistant", analyze_food_image_stream(st.session_state.image, input))
+                else:
+                    response = analyze_food_image(st.session_state.image, input)
             else:
                 msg = prompt + remarks_prompt
-                response = generate_food_bot_response(msg)
+                if STREAM_CHAT_RESPONSES:
+                    stream_message(chat_container, "assistant", generate_food_bot_response_stream(msg))
+                else:
+                    response = generate_food_bot_response(msg)
 
-        append_message(chat_container, "assistant", response)
+        if not STREAM_CHAT_RESPONSES:
+            append_message(chat_container, "assistant", response)
 
         # Scroll to the bottom
         st.markdown(
@@ -150,23 +194,15 @@ def generate_food_bot_response(prompt):
         str: AI-generated response about food topics, recipes, nutrition, etc.
         
     Uses OpenAI's GPT-4o model with chat history context to provide coherent,
-    conversational responses. Includes the last 5 messages for context continuity.
+    conversational responses. The context holds as many recent messages as fit
+    in CHAT_CONTEXT_TOKEN_BUDGET plus a rolling summary of older turns, see
+    utils.chat_context.build_chat_context.
     """
     client = get_OpenAI()
 
-    # Include the chat history for context
-    messages = [{"role": "system", "content": food_bot}]
-    for message in st.session_state.messages[
-            -5:]:  # Include last 5 messages for context
-        messages.append({
-            "role": message["role"],
-            "content": message["content"]
-        })
-    messages.append({"role": "user", "content": prompt})
-
     completion = client.chat.completions.create(
-        model="gpt-4o",  # Using a more capable model
-        messages=messages,
+        model=CHAT_MODEL,  # Using a more capable model
+        messages=_food_bot_messages(prompt),
         max_tokens=300,  # Adjust as needed
         temperature=0.7,  # Slightly more creative
     )
@@ -174,6 +210,53 @@ def generate_food_bot_response(prompt):
     return completion.choices[0].message.content
 
 
+def generate_food_bot_response_stream(prompt):
+    """
+    Stream the AI-powered response to a food-related text query as it is generated.
+    
+    Args:
+        prompt (str): User's text input/question about food
+        
+    Yields:
+        str: Successive pieces of the response generate_food_bot_response would return
+    """
+    client = get_OpenAI()
+
+    stream = client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=_food_bot_messages(prompt),
+        max_tokens=300,
+        temperature=0.7,
+        stream=True
+    )
+    for chunk in stream:
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        if text:
+            yield text
+
+
+def _food_bot_messages(prompt):
+    """
+    Build the FoodBot request messages for a question, see build_chat_context.
+    
+    Args:
+        prompt (str): User's text input/question about food
+        
+    Returns:
+        list[dict]: Chat messages including the token-budgeted history
+    """
+    if "chat_summary" not in st.session_state:
+        st.session_state.chat_summary = RollingSummary()
+
+    # The new question is already the last history entry, without the remarks
+    history = st.session_state.messages
+    if history and history[-1]["role"] == "user" and prompt.startswith(history[-1]["content"]):
+        history = history[:-1]
+
+    # Include the chat history for context
+    return build_chat_context(history, prompt, food_bot, st.session_state.chat_summary)
+
+
 def analyze_nutrition(image, remarks_prompt):
     """
     Analyze nutritional content of food from an uploaded image.
@@ -189,12 +272,98 @@ def analyze_nutrition(image, remarks_prompt):
             
     Extracts nutritional information and macronutrient data (protein, carbs, fat)
     from food images for both text analysis and chart generation.
+    
+    With COMBINED_NUTRITION_ANALYSIS set, the report and the macronutrients
+    come from a single vision call with a schema-validated JSON response,
+    otherwise from two calls.
+    
+    Successful analyses are stored in image_analysis_cache, so the same or a
+    visually identical image with the same remarks is answered without a call.
+    """
+    image_hash = perceptual_hash(image)
+    cache_context = ["analyze_nutrition", COMBINED_NUTRITION_ANALYSIS, remarks_prompt]
+    cached = image_analysis_cache.get(image_hash, cache_context)
+    if cached is not None:
+        return tuple(cached)
+
+    if not COMBINED_NUTRITION_ANALYSIS:
+        nutrition_info, chart_data = analyze_nutrition_two_calls(image, remarks_prompt)
+        if nutrition_info != IMAGE_ANALYSIS_FAILED:
+            image_analysis_cache.set(image_hash, cache_context, [nutrition_info, chart_data])
+        return nutrition_info, chart_data
+
+    msg = nutrition_analysis + remarks_prompt
+    response = response_imageOpenAI(msg, image, response_format=NUTRITION_RESPONSE_FORMAT, max_tokens=800)
+
+    try:
+        analysis = parse_nutrition_analysis(response)
+    except ValueError:
+        return IMAGE_ANALYSIS_FAILED, None
+
+    if not analysis["single_dish"]:
+        nutrition_info, chart_data = MULTIPLE_DISHES_MESSAGE, None
+    else:
+        nutrition_info = analysis["report"]
+        chart_data = [analysis["protein_grams"], analysis["carbs_grams"], analysis["fat_grams"]]
+
+    image_analysis_cache.set(image_hash, cache_context, [nutrition_info, chart_data])
+    return nutrition_info, chart_data
+
+
+def parse_nutrition_analysis(text):
+    """
+    Validate a nutrition analysis response against its schema.
+    
+    Args:
+        text (str): Raw JSON text returned by the model
+        
+    Returns:
+        NutritionAnalysis: Parsed analysis with a non-empty report for single dishes
+            and non-negative macronutrient grams
+            
+    Raises:
+        ValueError: If the text is not a JSON object matching NutritionAnalysis
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid nutrition analysis response: {e}") from e
+
+    if not isinstance(data, dict):
+        raise ValueError("Nutrition analysis response is not a JSON object")
+
+    if not isinstance(data.get("single_dish"), bool):
+        raise ValueError("Nutrition analysis response is missing 'single_dish'")
+
+    analysis: NutritionAnalysis = {"single_dish": data["single_dish"], "report": data.get("report")}
+    if not isinstance(analysis["report"], str) or (analysis["single_dish"] and not analysis["report"].strip()):
+        raise ValueError("Nutrition analysis response is missing 'report'")
+
+    for field in ("protein_grams", "carbs_grams", "fat_grams"):
+        value = data.get(field)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"Nutrition analysis response has an invalid '{field}'")
+        analysis[field] = float(value)
+
+    return analysis
+
+
+def analyze_nutrition_two_calls(image, remarks_prompt):
+    """
+    Analyze nutritional content with one vision call for the report and one for the chart data.
+    
+    Args:
+        image: PIL Image object of food/meal to analyze
+        remarks_prompt (str): User's dietary preferences/restrictions
+        
+    Returns:
+        tuple: (nutrition_info, chart_data), see analyze_nutrition
     """
     msg = nutrition + remarks_prompt
     nutrition_info = response_imageOpenAI(msg, image)
 
     if nutrition_info.strip() == 'None':
-        return "Unfortunately, I can't provide a nutrition breakdown for this image because it contains multiple dishes.", None
+        return MULTIPLE_DISHES_MESSAGE, None
 
     chart_data_str = response_imageOpenAI(chart_data_prompt, image)
 
@@ -219,9 +388,59 @@ def analyze_food_image(image, input):
     Acts as a versatile food image analyzer that can handle various requests
     like recipe suggestions, food identification, meal recommendations, etc.
     Provides concise, emoji-enhanced responses.
+    
+    Answers are stored in image_analysis_cache by perceptual image hash and
+    prompt, so repeated requests about the same image return instantly.
     """
-    prompt = f"You're a food suggestion bot, analyze the image. {input} .If you think the question is not asking about the image, just answer like a knowledgeable and helpful food and restaurant assistant and don't ever mention about the image. Your answer should be in point form and concise, plus emoji to help visualize."
-    return response_imageOpenAI(prompt, image)
+    prompt = _food_image_prompt(input)
+
+    image_hash = perceptual_hash(image)
+    cache_context = ["analyze_food_image", prompt]
+    analysis = image_analysis_cache.get(image_hash, cache_context)
+    if analysis is None:
+        analysis = response_imageOpenAI(prompt, image)
+        if analysis != IMAGE_ANALYSIS_FAILED:
+            image_analysis_cache.set(image_hash, cache_context, analysis)
+    return analysis
+
+
+def analyze_food_image_stream(image, input):
+    """
+    Stream a food image analysis as it is generated.
+    
+    Args:
+        image: PIL Image object to analyze
+        input (str): Specific analysis request (recipe, identification, etc.)
+        
+    Yields:
+        str: Successive pieces of the analysis analyze_food_image would return;
+             a cached analysis is yielded at once
+             
+    Shares image_analysis_cache with analyze_food_image; an analysis is
+    stored once it has been streamed completely.
+    """
+    prompt = _food_image_prompt(input)
+
+    image_hash = perceptual_hash(image)
+    cache_context = ["analyze_food_image", prompt]
+    analysis = image_analysis_cache.get(image_hash, cache_context)
+    if analysis is not None:
+        yield analysis
+        return
+
+    chunks = []
+    for text in stream_imageOpenAI(prompt, image):
+        chunks.append(text)
+        yield text
+
+    analysis = "".join(chunks)
+    if IMAGE_ANALYSIS_FAILED not in analysis:
+        image_analysis_cache.set(image_hash, cache_context, analysis)
+
+
+def _food_image_prompt(input):
+    """Wrap an image analysis request in the FoodBot image prompt."""
+    return f"You're a food suggestion bot, analyze the image. {input} .If you think the question is not asking about the image, just answer like a knowledgeable and helpful food and restaurant assistant and don't ever mention about the image. Your answer should be in point form and concise, plus emoji to help visualize."
 
 
 def display_nutrition_chart(chat_container, chart_data):
@@ -296,7 +515,169 @@ def append_message(chat_container, role, content):
     # st.toast(content)
     with chat_container:
         st.chat_message(role).markdown(content, unsafe_allow_html=True)
-        st.session_state.messages.append({
-            "role": role,
-            "content": f"{content}"
-        })
+        store_message(role, content)
+
+
+def stream_message(chat_container, role, chunks):
+    """
+    Stream a new message into the chat interface and store it in session state once complete.
+    
+    Args:
+        chat_container: Streamlit container for displaying chat messages
+        role (str): Message sender role ('user' or 'assistant')
+        chunks: Iterable of text pieces, e.g. a streaming response generator
+        
+    Returns:
+        str: The complete message content
+        
+    Counterpart of append_message that writes the text into the chat bubble
+    as it arrives, so the user sees the first words as soon as they are
+    generated.
+    """
+    with chat_container:
+        content = st.chat_message(role).write_stream(chunks)
+        store_message(role, content)
+    return content
+
+
+def load_chat_history():
+    """
+    Initialize the session's chat history, once per session and signed-in user.
+    
+    Signed-in users continue their stored conversation: only its last
+    CHAT_SESSION_TAIL messages are loaded, older ones are read from the
+    database page by page when the user asks for them. Guests start with an
+    empty history that only lives in the session.
+
+    Besides the messages, the session keeps a sliding window over the older
+    history: older_messages holds only the page loaded last,
+    chat_older_before_id is the cursor the next page is read before,
+    chat_older_count counts the stored messages older than the window and
+    chat_skipped_count those paged past between the window and the messages.
+    """
+    username = st.session_state.username if st.session_state.get("logged_in") else None
+    if "messages" in st.session_state and st.session_state.get("chat_history_user") == username:
+        return
+
+    st.session_state.chat_history_user = username
+    st.session_state.chat_summary = RollingSummary()
+    st.session_state.chat_visible_count = CHAT_PAGE_SIZE
+    st.session_state.older_messages = []
+    st.session_state.messages = []
+    st.session_state.chat_older_before_id = None
+    st.session_state.chat_older_count = 0
+    st.session_state.chat_skipped_count = 0
+    if username:
+        try:
+            messages = chat_store.load_messages(username, CHAT_SESSION_TAIL)
+            if messages:
+                st.session_state.chat_older_before_id = messages[0]["id"]
+                st.session_state.chat_older_count = chat_store.count_messages(username, before_id=messages[0]["id"])
+            st.session_state.messages = messages
+        except sqlite3.Error:
+            st.warning("Your earlier conversation could not be loaded.")
+
+
+def store_message(role, content):
+    """
+    Add a message to the session's chat history, storing it for signed-in users.
+    
+    Args:
+        role (str): Message sender role ('user' or 'assistant')
+        content (str): Message content
+        
+    Keeps at most CHAT_SESSION_TAIL messages in the session; older ones of
+    signed-in users remain available from the database.
+    """
+    content = f"{content}"
+    message_id = None
+    username = st.session_state.chat_history_user
+    if username:
+        try:
+            message_id = chat_store.add_message(username, role, content)
+        except sqlite3.Error:
+            pass
+    st.session_state.messages.append({
+        "id": message_id if message_id is not None else new_message_id(),
+        "role": role,
+        "content": content
+    })
+
+    messages = st.session_state.messages
+    excess = len(messages) - CHAT_SESSION_TAIL
+    if excess > 0:
+        dropped_ids = [message["id"] for message in messages[:excess] if isinstance(message["id"], int)]
+        del messages[:excess]
+        st.session_state.chat_summary.drop_leading(excess)
+        if dropped_ids:
+            # Move the window back next to the messages, everything before them is on disk
+            st.session_state.chat_older_count += len(dropped_ids) + len(st.session_state.older_messages) + st.session_state.chat_skipped_count
+            st.session_state.older_messages = []
+            st.session_state.chat_skipped_count = 0
+            st.session_state.chat_older_before_id = next((message["id"] for message in messages if isinstance(message["id"], int)), message_id)
+
+
+def new_message_id():
+    """
+    Create the id of a new chat message.
+    
+    Returns:
+        str: Unique id of a message that is only kept in the session
+    """
+    return uuid.uuid4().hex
+
+
+def display_chat_history(chat_container):
+    """
+    Render the most recent chat messages, with a button to load older ones.
+    
+    Args:
+        chat_container: Streamlit container for chat messages
+        
+    Only the last CHAT_PAGE_SIZE messages are rendered on a rerun; every press
+    of the "Load older messages" button adds another page, so a rerun costs
+    the same however long the conversation is. Past the session's messages,
+    each press replaces the shown page of older messages with the one before
+    it, so the whole stored history stays reachable while the session holds
+    at most one page of it.
+    """
+    messages = st.session_state.messages
+    visible_count = min(st.session_state.chat_visible_count, len(messages))
+    hidden_count = len(messages) - visible_count + st.session_state.chat_older_count
+
+    with chat_container:
+        if hidden_count > 0:
+            st.button(f"Load older messages ({hidden_count} more)", key="load_older_messages", on_click=_show_older_messages)
+
+        for message in st.session_state.older_messages:
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"], unsafe_allow_html=True)
+        if st.session_state.chat_skipped_count > 0:
+            st.caption(f"{st.session_state.chat_skipped_count} newer messages not shown")
+
+        for message in messages[len(messages) - visible_count:]:
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"], unsafe_allow_html=True)
+
+
+def _show_older_messages():
+    """Show one more page of older chat messages, called before the rerun of the button click."""
+    if st.session_state.chat_visible_count < len(st.session_state.messages):
+        st.session_state.chat_visible_count += CHAT_PAGE_SIZE
+        return
+
+    # Past the session's messages, slide the window one page further back
+    if st.session_state.chat_older_count <= 0 or st.session_state.chat_older_before_id is None:
+        return
+    try:
+        page = chat_store.load_messages(st.session_state.chat_history_user, CHAT_PAGE_SIZE, before_id=st.session_state.chat_older_before_id)
+    except sqlite3.Error:
+        return
+    if not page:
+        st.session_state.chat_older_count = 0
+        return
+
+    st.session_state.chat_skipped_count += len(st.session_state.older_messages)
+    st.session_state.older_messages = page
+    st.session_state.chat_older_before_id = page[0]["id"]
+    st.session_state.chat_older_count = max(st.session_state.chat_older_count - len(page), 0)
@@ -1,21 +1,25 @@
 import streamlit as st
-from utils.article import get_article_info, display_article_card
+from utils.article import get_articles_info, display_article_card
 from utils.constants import articles
 from utils.style import display_cards
 
 def display_foodguide():
     """
     Display the food guide section with latest food articles in a grid layout.
+    
+    Article cards come from the shared article cache, so the tab only downloads
+    articles that were never fetched before.
     """
     st.header("Latest Food Articles")
     display_cards()
     num_columns = min(3, len(articles))  
+    articles_info = get_articles_info(articles)
 
     # Display articles in rows
     for i in range(0, len(articles), num_columns):
         cols = st.columns(num_columns)
         for j in range(num_columns):
             if i + j < len(articles):
-                title, img_url, summary = get_article_info(articles[i + j])
+                title, img_url, summary = articles_info[i + j]
                 with cols[j]:
                     display_article_card(title, img_url, summary, articles[i + j])
\ No newline at end of file
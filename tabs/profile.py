@@ -1,5 +1,5 @@
 import streamlit as st
-from login import init_connection, get_cursor, update_user, make_hashes
+from utils.user_repository import update_user
 
 def sign_out():
     """
@@ -51,18 +51,9 @@ def display_profile():
           st.session_state.remarks = new_remarks
           st.session_state.password = new_password
 
-          update_user(st.session_state.username)
-          conn = init_connection()
-          
-          # Update password separately if it has changed
-          if new_password != st.session_state.password:
-            with conn.session as s:
-              s.execute("UPDATE users SET password = ? WHERE username = ?",
-                      (make_hashes(new_password), st.session_state.username))
-            conn.commit()
+          # Saves the remarks and the (hashed) password in one transaction
+          update_user(st.session_state.username, new_password, new_remarks)
 
-          st.session_state.password = new_password  # Update session state after hashing
-          
           st.success("Profile updated successfully!")
 
         if st.button("Sign Out"):
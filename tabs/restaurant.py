@@ -3,6 +3,7 @@ import math
 import urllib.parse
 
 from utils.google_map_api import get_review_and_photo, gmaps_text_search, _get_photo_url, get_location_info
+from utils.photo_store import get_restaurant_photo_urls
 from utils.restaurant_ai import get_review_summary, add_column
 from utils.data_structures import Input
 from utils.data_structures import Input, Restaurant, RestaurantResult
@@ -27,6 +28,12 @@ def display_restaurant():
 
         st.markdown("## AI-Suggested Restaurants")
 
+        # Resolve photos once, the URLs (or '' for a failed photo) are kept on the restaurants for later reruns
+        unresolved = [restaurant for restaurant in results if not restaurant.is_photo_resolved() and restaurant.get_photo_reference()]
+        photo_urls = get_restaurant_photo_urls([restaurant.get_photo_reference() for restaurant in unresolved])
+        for restaurant, photo_url in zip(unresolved, photo_urls):
+            restaurant.set_photo(photo_url)
+
         for index, restaurant in enumerate(results):
             name = restaurant.get_name()
             place_id = restaurant.get_place_id()
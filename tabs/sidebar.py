@@ -7,10 +7,14 @@ from utils.google_map_api import get_location_info
 from utils.restaurant_ai import process_restaurant
 from utils.data_structures import Input, Restaurant, RestaurantResult
 
-def display_sidebar():
+def display_sidebar(live_results=None):
     """
     Display the interactive sidebar for restaurant search with comprehensive filtering options.
     
+    Args:
+        live_results (optional): st.empty() placeholder in the Restaurant tab where
+            restaurant cards are streamed while a search is running
+    
     Handles both authenticated and guest user experiences with appropriate
     feature availability and personalization options.
     """
@@ -72,7 +76,7 @@ def display_sidebar():
 
         st.toast("Searching for restaurants...")
         input_obj: Input = Input(int(min_rating), int(max_rating), city_input, budget, craving, cuisine, travel_time, remarks)
-        process_result = process_restaurant(input_obj)
+        process_result = process_restaurant(input_obj, live_results)
         try:
             st.session_state.results = process_result if process_result else st.session_state.results
         except:
@@ -1,45 +1,248 @@
-from bs4 import BeautifulSoup
-import requests
+import codecs
 import streamlit as st
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
 from streamlit_theme import st_theme
 
+from utils.cache import PersistentCache
+from utils import http_client
+from utils.constants import ARTICLE_CACHE_TTL, ARTICLE_CACHE_STALE_TTL, ARTICLE_FAILURE_CACHE_TTL, ARTICLE_FAILURE_CACHE_MAX_ENTRIES, ARTICLE_MAX_WORKERS, ARTICLE_MAX_BYTES, ARTICLE_CHUNK_SIZE
 
-def get_article_info(url):
+# Parsed article cards keyed by URL, served stale while they are revalidated
+article_cache = PersistentCache("articles", ttl=ARTICLE_CACHE_TTL, stale_ttl=ARTICLE_CACHE_STALE_TTL)
+# URLs that failed or had nothing to show, stored as an empty result so they are not refetched on every rerun
+article_failure_cache = PersistentCache("article_failures", ttl=ARTICLE_FAILURE_CACHE_TTL, max_entries=ARTICLE_FAILURE_CACHE_MAX_ENTRIES)
+
+ERROR_ARTICLE = ("Error fetching article", "https://via.placeholder.com/300x200.png?text=Error", "Could not fetch article information")
+
+
+class ArticleMetadataParser(HTMLParser):
+    """
+    Streaming HTML parser collecting only the information shown on an article card.
+    
+    Fed with chunks of the page, it records the og:image and og:description meta
+    tags, the text of the first <h1> and the text of the first <p>, without
+    building a document tree. done becomes True as soon as nothing further in
+    the page can change the result, so the rest of the download can be skipped.
+    """
+
+    def __init__(self):
+        """Initialize an empty parser."""
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.img_url = None
+        self.description = None
+        self.first_paragraph = None
+        self.in_body = False
+        self._capture = None
+        self._depth = 0
+        self._text = []
+
+    @property
+    def empty(self) -> bool:
+        """Whether the page had none of the card fields."""
+        return self.title is None and self.img_url is None and self.description is None and self.first_paragraph is None
+
+    @property
+    def done(self) -> bool:
+        """Whether every card field is known (meta tags can only be missing once the body started)."""
+        image_done = self.img_url is not None or self.in_body
+        summary_done = self.description is not None or (self.in_body and self.first_paragraph is not None)
+        return self.title is not None and image_done and summary_done
+
+    def handle_starttag(self, tag, attrs):
+        """Record meta tags and start capturing the first <h1> and <p>."""
+        if tag == 'meta':
+            attrs = dict(attrs)
+            if attrs.get('property') == 'og:image' and self.img_url is None:
+                self.img_url = attrs.get('content') or ''
+            elif attrs.get('property') == 'og:description' and self.description is None:
+                self.description = attrs.get('content') or ''
+            return
+
+        if tag in ('body', 'h1', 'p'):
+            self.in_body = True
+
+        if tag == self._capture:
+            self._depth += 1
+        elif tag == 'h1' and self._capture == 'p':
+            # a heading implicitly closes an open paragraph
+            self._finish_capture()
+
+        if self._capture is None and ((tag == 'h1' and self.title is None) or (tag == 'p' and self.first_paragraph is None)):
+            self._capture = tag
+            self._depth = 1
+            self._text = []
+
+    def handle_endtag(self, tag):
+        """Finish a capture at its matching end tag."""
+        if tag == 'head':
+            self.in_body = True
+        elif tag == self._capture:
+            self._depth -= 1
+            if self._depth == 0:
+                self._finish_capture()
+
+    def handle_data(self, data):
+        """Collect text inside the captured tag."""
+        if self._capture is not None:
+            self._text.append(data)
+
+    def close(self):
+        """Process the remaining buffered text and keep a <h1> or <p> left open by a truncated page."""
+        super().close()
+        if self._capture is not None:
+            self._finish_capture()
+
+    def _finish_capture(self):
+        """Store the captured text as the title or first paragraph."""
+        text = ''.join(self._text).strip()
+        if self._capture == 'h1':
+            self.title = text
+        else:
+            self.first_paragraph = text
+        self._capture = None
+        self._text = []
+
+    def result(self):
+        """
+        Get the card information collected so far.
+        
+        Returns:
+            tuple: (title, img_url, summary), see get_articles_info
+        """
+        title = self.title if self.title is not None else "No title found"
+        img_url = self.img_url if self.img_url is not None else "https://via.placeholder.com/300x200.png?text=No+Image"
+
+        # Extract summary (first paragraph or meta description)
+        if self.description is not None:
+            summary = self.description
+        elif self.first_paragraph is not None:
+            summary = self.first_paragraph
+        else:
+            summary = "No summary available"
+
+        return title, img_url, summary[:200] + "..."  # Truncate summary to 200 characters
+
+
+def get_articles_info(urls, max_workers=ARTICLE_MAX_WORKERS):
+    """
+    Get the (title, img_url, summary) of several articles, served from article_cache.
+    
+    Args:
+        urls (list[str]): Article URLs to display
+        max_workers (int, optional): Maximum number of articles downloaded at once
+        
+    Returns:
+        list[tuple]: One (title, img_url, summary) tuple per URL, in the same order,
+                     with an error placeholder for articles that could not be fetched
+        
+    Cached articles cost no network call. Stale ones are returned right away and
+    revalidated in the background with their ETag/Last-Modified, and articles
+    missing from the cache are downloaded in parallel. Articles that failed are
+    only tried again after ARTICLE_FAILURE_CACHE_TTL.
     """
-    Scrape and extract article information from a given URL.
+    if not urls:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as executor:
+        return list(executor.map(_get_cached_article_info, urls))
+
+def _get_cached_article_info(url):
+    """
+    Get one article card from article_cache, loading it on a miss.
     
     Args:
-        url (str): The URL of the article to scrape
+        url (str): The URL of the article
         
     Returns:
-        tuple: A tuple containing (title, img_url, summary) where:
-            - title (str): Article title from h1 tag or "No title found"
-            - img_url (str): Article image from og:image meta tag or placeholder
-            - summary (str): Article summary from og:description meta tag or first paragraph,
-                           truncated to 200 characters with "..." suffix
+        tuple: (title, img_url, summary), or ERROR_ARTICLE if it could not be fetched
     """
+    if article_failure_cache.get(url) is not None:
+        return ERROR_ARTICLE
     try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        article = article_cache.get_or_load(url, lambda: _fetch_article(url, article_cache.peek(url)))
+        return article["title"], article["img_url"], article["summary"]
+    except Exception:
+        article_failure_cache.set(url, {})
+        return ERROR_ARTICLE
 
-        # Extract title
-        title = soup.find('h1').text.strip() if soup.find('h1') else "No title found"
+def _fetch_article(url, previous=None):
+    """
+    Download and parse an article, revalidating a previously parsed version if given.
+    
+    Args:
+        url (str): The URL of the article
+        previous (dict, optional): Earlier result of this function for the same URL
+        
+    Returns:
+        dict: 'title', 'img_url', 'summary', 'etag' and 'last_modified' of the article
+        
+    Sends If-None-Match/If-Modified-Since when previous has validators and
+    returns previous unchanged if the server answers 304 Not Modified.
 
-        # Extract image
-        img = soup.find('meta', property='og:image')
-        img_url = img['content'] if img else "https://via.placeholder.com/300x200.png?text=No+Image"
+    Raises:
+        requests.exceptions.RequestException: If the page could not be downloaded
+        ValueError: If the page has none of the card fields
+    """
+    headers = {}
+    if previous:
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
 
-        # Extract summary (first paragraph or meta description)
-        summary = soup.find('meta', property='og:description')
-        if summary:
-            summary = summary['content']
-        else:
-            summary = soup.find('p').text.strip() if soup.find('p') else "No summary available"
+    with http_client.stream(url, headers=headers) as response:
+        if response.status_code == 304 and previous:
+            return previous
+        response.raise_for_status()
 
-        return title, img_url, summary[:200] + "..."  # Truncate summary to 200 characters
-    except Exception as e:
-        st.error(f"Error fetching article info: {str(e)}")
-        return "Error fetching article", "https://via.placeholder.com/300x200.png?text=Error", "Could not fetch article information"
+        title, img_url, summary = _parse_article_stream(response)
+        return {
+            "title": title,
+            "img_url": img_url,
+            "summary": summary,
+            "etag": response.headers.get("ETag", ""),
+            "last_modified": response.headers.get("Last-Modified", "")
+        }
+
+def _parse_article_stream(response):
+    """
+    Extract the card information while the page is downloading, stopping early.
+    
+    Args:
+        response (requests.Response): Streamed response of the article page
+        
+    Returns:
+        tuple: (title, img_url, summary), see get_articles_info
+        
+    Raises:
+        ValueError: If the page has none of the card fields
+        
+    Reads the body in ARTICLE_CHUNK_SIZE chunks and stops as soon as the
+    parser has everything it needs, or after ARTICLE_MAX_BYTES at the latest.
+    """
+    content_type = response.headers.get("Content-Type", "")
+    encoding = response.encoding if "charset" in content_type.lower() and response.encoding else "utf-8"
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    parser = ArticleMetadataParser()
+    received = 0
+    for chunk in response.iter_content(chunk_size=ARTICLE_CHUNK_SIZE):
+        received += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or received >= ARTICLE_MAX_BYTES:
+            break
+
+    # Flush the decoder and the parser's buffered text, e.g. a page cut off inside the summary paragraph
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    if parser.empty:
+        raise ValueError("Article page has no title, image or summary")
+    return parser.result()
 
 def display_article_card(title, img_url, summary, article_url):
     """
@@ -0,0 +1,253 @@
+"""
+This file contains the asyncio backend of the search pipeline: one shared event loop, the async HTTP client and the async Google Maps stages.
+"""
+
+import time
+import asyncio
+import random
+import threading
+from concurrent.futures import Future
+
+import httpx
+
+from utils import http_client
+from utils.data_structures import Input
+from utils.google_map_api import text_search_cache, details_cache, text_search_key, text_search_request, filter_text_search_results, place_details_request, parse_place_details, _fetch_place_details
+from utils.constants import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES, HTTP_BACKOFF_FACTOR, HTTP_POOL_CONNECTIONS, HTTP_MAX_CONCURRENCY_PER_HOST
+
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Seconds between attempts to take a host slot shared with utils.http_client
+_HOST_SLOT_POLL_INTERVAL = 0.01
+
+_lock = threading.Lock()
+_loop = None
+_client = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the event loop shared by the whole process, starting it on a daemon thread on first use.
+
+    Returns:
+        asyncio.AbstractEventLoop: Running event loop
+
+    A single long-lived loop lets the HTTP client and the Gemini async client
+    keep their connections across searches; both are bound to the loop they
+    were created on.
+    """
+    global _loop
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-pipeline", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def submit(coro) -> Future:
+    """
+    Schedule a coroutine on the shared event loop.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        concurrent.futures.Future: Future of the coroutine's result, usable from any thread
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def run(coro, timeout: float = None):
+    """
+    Run a coroutine on the shared event loop and wait for its result.
+
+    Args:
+        coro: Coroutine to run
+        timeout (float, optional): Seconds to wait. Defaults to no limit.
+
+    Returns:
+        The coroutine's result; its exceptions are raised in the calling thread
+    """
+    return submit(coro).result(timeout)
+
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Get the async HTTP client of the shared event loop, creating it on first use.
+
+    Returns:
+        httpx.AsyncClient: Client with keep-alive connection pooling and the timeouts of utils.http_client
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_CONNECTIONS * HTTP_MAX_CONCURRENCY_PER_HOST,
+                max_keepalive_connections=HTTP_POOL_CONNECTIONS * HTTP_MAX_CONCURRENCY_PER_HOST
+            )
+        )
+    return _client
+
+
+async def _acquire_host_slot(slot: threading.BoundedSemaphore):
+    """
+    Take a slot of a host's thread semaphore without blocking the event loop.
+
+    Args:
+        slot (threading.BoundedSemaphore): Semaphore of utils.http_client.host_semaphore
+
+    Polling keeps cancellation safe: a cancelled wait never ends up holding
+    the slot.
+    """
+    while not slot.acquire(blocking=False):
+        await asyncio.sleep(_HOST_SLOT_POLL_INTERVAL)
+
+
+def _connection_trace(host: str):
+    """
+    Build an httpcore trace callback recording new connections in http_client's stats.
+
+    Args:
+        host (str): Host name the connections belong to
+
+    Returns:
+        Coroutine function for the 'trace' request extension
+    """
+    started = {}
+
+    async def trace(event_name: str, info: dict):
+        step, _, phase = event_name.rpartition(".")
+        if step not in ("connection.connect_tcp", "connection.start_tls"):
+            return
+        if phase == "started":
+            started[step] = time.perf_counter()
+        elif phase == "complete" and step in started:
+            seconds = time.perf_counter() - started.pop(step)
+            if step == "connection.connect_tcp":
+                http_client.record(host, connections=1, connect_seconds=seconds)
+            else:
+                http_client.record(host, connect_seconds=seconds)
+
+    return trace
+
+
+async def _timed_get(client: httpx.AsyncClient, host: str, url: str, **kwargs) -> httpx.Response:
+    """Send one GET request, recording its timings like utils.http_client.get."""
+    start = time.perf_counter()
+    async with client.stream("GET", url, extensions={"trace": _connection_trace(host)}, **kwargs) as response:
+        wait_seconds = time.perf_counter() - start
+        await response.aread()
+    http_client.record(host, requests=1, wait_seconds=wait_seconds,
+                       transfer_seconds=max(time.perf_counter() - start - wait_seconds, 0.0))
+    return response
+
+
+async def get(url: str, **kwargs) -> httpx.Response:
+    """
+    Send a GET request through the shared async client.
+
+    Args:
+        url (str): Request URL
+        **kwargs: Further arguments of httpx.AsyncClient.stream, e.g. params
+
+    Returns:
+        httpx.Response: The response, with the body already read
+
+    Follows the policy of utils.http_client.get: connection errors, 429 and
+    5xx responses are retried HTTP_RETRIES times with jittered exponential
+    backoff. Requests take the same per-host slots as http_client, so at most
+    HTTP_MAX_CONCURRENCY_PER_HOST requests per host are in flight across both
+    clients, and they are counted in http_client.stats.
+    """
+    client = _get_client()
+    host = httpx.URL(url).host
+    slot = http_client.host_semaphore(host)
+    await _acquire_host_slot(slot)
+    try:
+        for attempt in range(HTTP_RETRIES + 1):
+            retry_after = None
+            try:
+                response = await _timed_get(client, host, url, **kwargs)
+            except httpx.TransportError:
+                if attempt == HTTP_RETRIES:
+                    raise
+            else:
+                if response.status_code not in _RETRY_STATUSES or attempt == HTTP_RETRIES:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+
+            backoff = HTTP_BACKOFF_FACTOR * (2 ** attempt)
+            if retry_after and retry_after.isdigit():
+                backoff = float(retry_after)
+            else:
+                backoff += random.uniform(0, backoff)
+            await asyncio.sleep(backoff)
+    finally:
+        slot.release()
+
+
+async def gmaps_text_search_async(search_prompt: str, input: Input) -> list:
+    """
+    Coroutine version of google_map_api.gmaps_text_search, sharing text_search_cache.
+
+    Args:
+        search_prompt (str): Search query text for finding restaurants
+        input (Input): User input object containing search criteria and filters
+
+    Returns:
+        list: Filtered list of restaurant data dictionaries, empty if the search failed
+
+    Like every cache access of this module, the SQLite reads and writes run
+    on a worker thread, so a locked cache database never stalls the event
+    loop that all sessions share.
+    """
+    min_rating = input.get_min_rating()
+    max_rating = input.get_max_rating()
+    radius = input.get_radius()
+
+    cache_key = text_search_key(search_prompt, radius, min_rating, max_rating)
+    results = await asyncio.to_thread(text_search_cache.get, cache_key)
+    if results is None:
+        base_url, params = text_search_request(search_prompt, radius, min_rating, max_rating)
+        response = await get(base_url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        if data["status"] == "OK" and data["results"]:
+            results = data["results"]
+            await asyncio.to_thread(text_search_cache.set, cache_key, results)
+
+    return filter_text_search_results(results or [], min_rating, max_rating)
+
+
+async def get_place_details_async(place_id: str) -> dict:
+    """
+    Coroutine version of google_map_api.get_place_details, sharing details_cache.
+
+    Args:
+        place_id (str): Google Places unique identifier for the restaurant
+
+    Returns:
+        dict: The 'result' object of the Place Details response
+
+    Raises:
+        ValueError: If the API does not return a result for the place
+
+    Stale entries are returned right away and refreshed by the cache's
+    background threads, off the critical path of the search.
+    """
+    entry = await asyncio.to_thread(details_cache.lookup, place_id)
+    if entry is not None:
+        details, is_fresh = entry
+        if not is_fresh:
+            details_cache.refresh_in_background(place_id, lambda: _fetch_place_details(place_id))
+        return details
+
+    details_url, details_params = place_details_request(place_id)
+    response = await get(details_url, params=details_params)
+    response.raise_for_status()
+    details = parse_place_details(response.json())
+    await asyncio.to_thread(details_cache.set, place_id, details)
+    return details
@@ -0,0 +1,359 @@
+"""
+This file contains the persistent cache shared by all Streamlit sessions.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import time
+import zlib
+import hashlib
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import db
+from utils.constants import CACHE_DB_FILE, CACHE_REFRESH_WORKERS, CACHE_TOUCH_INTERVAL
+
+# Background refreshes of stale entries, shared by all caches
+_refresh_executor = ThreadPoolExecutor(max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+
+# Cache database files whose table already exists in this process
+_schema_lock = threading.Lock()
+_schema_ready: set = set()
+
+
+def make_key(*parts) -> str:
+    """
+    Build a fixed-length cache key from any JSON-serializable parts.
+
+    Args:
+        *parts: Values that together identify a cached item
+
+    Returns:
+        str: SHA-256 hex digest of the JSON encoded parts
+    """
+    raw = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _ensure_schema(path: str):
+    """
+    Create the cache table of a database file, once per process.
+
+    Args:
+        path (str): SQLite database file
+    """
+    if path in _schema_ready:
+        return
+    with _schema_lock:
+        if path in _schema_ready:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with db.connection(path) as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS cache_entries
+                            (namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,
+                             compressed INTEGER NOT NULL, size INTEGER NOT NULL,
+                             created_at REAL NOT NULL, accessed_at REAL NOT NULL,
+                             PRIMARY KEY (namespace, key))''')
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_entries_lru ON cache_entries (namespace, accessed_at)')
+        _schema_ready.add(path)
+
+
+class PersistentCache:
+    """
+    SQLite-backed key/value cache with a time-to-live, LRU eviction and compressed payloads.
+
+    Each instance owns one namespace of the cache database and is created once
+    at import time, so it is shared by every Streamlit session of the process
+    and its entries survive restarts. Values must be JSON-serializable.
+    Cache failures never propagate: a broken or locked database behaves like a miss.
+    
+    With a stale_ttl, entries older than ttl are kept for stale_ttl more seconds
+    and get_or_load serves them immediately while refreshing them in the background.
+    """
+
+    def __init__(self, namespace: str, ttl: float, max_entries: int = None, max_bytes: int = None, compress: bool = True, path: str = CACHE_DB_FILE, stale_ttl: float = 0):
+        """
+        Initialize a cache namespace.
+
+        Args:
+            namespace (str): Name separating this cache's entries from other caches
+            ttl (float): Seconds an entry stays valid after it was stored
+            max_entries (int, optional): Maximum number of entries, least recently used evicted first
+            max_bytes (int, optional): Maximum total stored payload size in bytes
+            compress (bool, optional): Store payloads zlib-compressed. Defaults to True.
+            path (str, optional): SQLite database file. Defaults to CACHE_DB_FILE.
+            stale_ttl (float, optional): Extra seconds an expired entry may still be
+                served by get_or_load while it is refreshed. Defaults to 0.
+        """
+        self.namespace: str = namespace
+        self.ttl: float = ttl
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+        self.compress: bool = compress
+        self.path: str = path
+        self.stale_ttl: float = stale_ttl
+        self.hits: int = 0
+        self.stale_hits: int = 0
+        self.misses: int = 0
+        self._stats_lock = threading.Lock()
+        self._refreshing: set = set()
+
+    @contextmanager
+    def _connection(self):
+        """
+        Check out a connection to the cache database for one operation.
+
+        Yields:
+            sqlite3.Connection: Autocommit connection in WAL mode from the process-wide pool of utils.db
+
+        Streamlit runs every rerun on a new thread, so connections are not kept
+        per thread: the pool opens each connection once and the table is
+        created once per process.
+        """
+        _ensure_schema(self.path)
+        with db.connection(self.path) as conn:
+            yield conn
+
+    def _count(self, hit: bool, stale: bool = False):
+        """Record a cache hit, stale hit or miss."""
+        with self._stats_lock:
+            if hit and stale:
+                self.stale_hits += 1
+            elif hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _encode(self, value) -> bytes:
+        """Serialize (and optionally compress) a value for storage."""
+        payload = json.dumps(value, separators=(',', ':')).encode('utf-8')
+        return zlib.compress(payload) if self.compress else payload
+
+    @staticmethod
+    def _decode(payload: bytes, compressed: int):
+        """Restore a value stored by _encode."""
+        if compressed:
+            payload = zlib.decompress(payload)
+        return json.loads(payload.decode('utf-8'))
+
+    def get(self, key: str, default=None):
+        """
+        Look up a fresh entry.
+
+        Args:
+            key (str): Cache key
+            default: Value returned on a miss. Defaults to None.
+
+        Returns:
+            The cached value, or default if the key is missing or expired
+        """
+        entry = self._read(key, max_age=self.ttl)
+        if entry is None:
+            self._count(hit=False)
+            return default
+
+        self._count(hit=True)
+        return entry[0]
+
+    def get_or_load(self, key: str, loader):
+        """
+        Look up an entry, loading it on a miss and refreshing it in the background when stale.
+
+        Args:
+            key (str): Cache key
+            loader (callable): Function without arguments returning the value to cache
+
+        Returns:
+            The fresh or stale cached value, or the freshly loaded value on a miss
+
+        Exceptions raised by loader on a miss propagate to the caller; failed
+        background refreshes keep the stale entry in place.
+        """
+        entry = self.lookup(key)
+        if entry is None:
+            value = loader()
+            self.set(key, value)
+            return value
+
+        value, is_fresh = entry
+        if not is_fresh:
+            self.refresh_in_background(key, loader)
+        return value
+
+    def lookup(self, key: str):
+        """
+        Look up a fresh or stale entry, counting a hit, stale hit or miss.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            tuple or None: (value, is_fresh), or None on a miss
+
+        Building block of get_or_load for callers that load values themselves,
+        e.g. from a coroutine.
+        """
+        entry = self._read(key, max_age=self.ttl + self.stale_ttl)
+        if entry is None:
+            self._count(hit=False)
+        else:
+            self._count(hit=True, stale=not entry[1])
+        return entry
+
+    def peek(self, key: str, default=None, max_age: float = float('inf')):
+        """
+        Read an entry regardless of its age, without counting a hit or miss.
+
+        Args:
+            key (str): Cache key
+            default: Value returned if the key is missing. Defaults to None.
+            max_age (float, optional): Maximum entry age in seconds. Defaults to any age.
+
+        Returns:
+            The cached value (possibly expired but not yet evicted), or default
+
+        Useful to revalidate a stale entry, e.g. with its ETag, inside a loader.
+        """
+        entry = self._read(key, max_age=max_age)
+        return default if entry is None else entry[0]
+
+    def _read(self, key: str, max_age: float):
+        """
+        Read an entry no older than max_age and mark it as recently used.
+
+        Args:
+            key (str): Cache key
+            max_age (float): Maximum entry age in seconds
+
+        Returns:
+            tuple or None: (value, is_fresh), or None if missing, too old or unreadable
+
+        The last use is only written when it is more than CACHE_TOUCH_INTERVAL
+        seconds old, so most hits stay read-only and never take the write lock.
+        """
+        try:
+            with self._connection() as conn:
+                row = conn.execute('SELECT value, compressed, created_at, accessed_at FROM cache_entries WHERE namespace = ? AND key = ?',
+                                   (self.namespace, key)).fetchone()
+                now = time.time()
+                if row is None or now - row[2] > max_age:
+                    return None
+
+                if now - row[3] > CACHE_TOUCH_INTERVAL:
+                    conn.execute('UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                                 (now, self.namespace, key))
+            return self._decode(row[0], row[1]), now - row[2] <= self.ttl
+        except (sqlite3.Error, zlib.error, ValueError):
+            return None
+
+    def refresh_in_background(self, key: str, loader):
+        """
+        Reload an entry on the shared refresh executor, at most once at a time per key.
+
+        Args:
+            key (str): Cache key
+            loader (callable): Function without arguments returning the new value
+        """
+        with self._stats_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.set(key, loader())
+            except Exception:
+                pass
+            finally:
+                with self._stats_lock:
+                    self._refreshing.discard(key)
+
+        _refresh_executor.submit(refresh)
+
+    def set(self, key: str, value):
+        """
+        Store an entry, then evict expired and least recently used entries over the limits.
+
+        Args:
+            key (str): Cache key
+            value: JSON-serializable value to store
+        """
+        try:
+            payload = self._encode(value)
+            now = time.time()
+            with self._connection() as conn:
+                conn.execute('INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (self.namespace, key, payload, int(self.compress), len(payload), now, now))
+                self._evict(conn, now)
+        except (sqlite3.Error, TypeError, ValueError):
+            pass
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """
+        Remove expired entries and enforce max_entries and max_bytes.
+
+        Args:
+            conn (sqlite3.Connection): Connection to run the deletes on
+            now (float): Current timestamp
+        """
+        conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?',
+                     (self.namespace, now - self.ttl - self.stale_ttl))
+
+        if self.max_entries is not None:
+            conn.execute('''DELETE FROM cache_entries WHERE namespace = ? AND key IN
+                            (SELECT key FROM cache_entries WHERE namespace = ?
+                             ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)''',
+                         (self.namespace, self.namespace, self.max_entries))
+
+        if self.max_bytes is not None:
+            conn.execute('''DELETE FROM cache_entries WHERE namespace = ? AND key IN
+                            (SELECT key FROM
+                                (SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS running_size
+                                 FROM cache_entries WHERE namespace = ?)
+                             WHERE running_size > ?)''',
+                         (self.namespace, self.namespace, self.max_bytes))
+
+    def delete(self, key: str):
+        """
+        Remove an entry if it exists.
+
+        Args:
+            key (str): Cache key
+        """
+        try:
+            with self._connection() as conn:
+                conn.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (self.namespace, key))
+        except sqlite3.Error:
+            pass
+
+    def stats(self) -> dict:
+        """
+        Get hit/miss counters of this process and the current size of the namespace.
+
+        Returns:
+            dict: 'hits', 'stale_hits', 'misses', 'hit_ratio', 'entries' and 'bytes'
+        """
+        with self._stats_lock:
+            hits, stale_hits, misses = self.hits, self.stale_hits, self.misses
+
+        try:
+            with self._connection() as conn:
+                entries, size = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?',
+                    (self.namespace,)).fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+
+        total = hits + stale_hits + misses
+        return {
+            "hits": hits,
+            "stale_hits": stale_hits,
+            "misses": misses,
+            "hit_ratio": (hits + stale_hits) / total if total else 0.0,
+            "entries": entries,
+            "bytes": size
+        }
@@ -0,0 +1,224 @@
+"""
+This file contains the token-budgeted conversation window of FoodBot.
+"""
+
+import re
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.llm_api import get_OpenAI
+from utils.prompt import chat_summary
+from utils.constants import CHAT_CONTEXT_TOKEN_BUDGET, CHAT_MESSAGE_MAX_TOKENS, CHAT_TOKENIZER_ENCODING, CHAT_SUMMARY_MODEL, CHAT_SUMMARY_MAX_TOKENS
+
+try:
+    import tiktoken
+except ImportError:  # a dependency in pyproject.toml, without it (e.g. a partial install) token counts are estimated
+    tiktoken = None
+
+# Tokens the chat format adds to every message besides its content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_HTML_TAG = re.compile(r"<[^>]+>")
+_encoding = None
+_encoding_lock = threading.Lock()
+
+# Rolling summary updates of all sessions, off the request path
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+
+
+def _get_encoding():
+    """
+    Get the tiktoken encoding of the chat model, loading it on first use.
+
+    Returns:
+        tiktoken.Encoding or None: The encoding, or None if tiktoken is not available
+    """
+    global _encoding
+    if tiktoken is not None and _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    _encoding = tiktoken.get_encoding(CHAT_TOKENIZER_ENCODING)
+                except Exception:
+                    return None
+    return _encoding
+
+
+@lru_cache(maxsize=2048)
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text.
+
+    Args:
+        text (str): Text to count
+
+    Returns:
+        int: Exact count with tiktoken, otherwise an estimate of one token per four characters
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Shorten a text to at most max_tokens tokens.
+
+    Args:
+        text (str): Text to shorten
+        max_tokens (int): Maximum number of tokens
+
+    Returns:
+        str: The text itself if it fits, otherwise its beginning followed by '...'
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4] + "..."
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]) + "..."
+
+
+def _clean_content(content: str) -> str:
+    """Strip HTML from a stored chat message and cap its length for the context window."""
+    return truncate_to_tokens(_HTML_TAG.sub("", content).strip(), CHAT_MESSAGE_MAX_TOKENS)
+
+
+class RollingSummary:
+    """
+    Summary of the chat messages older than the context window, kept per session.
+
+    The summary covers history[:covered]. When messages fall out of the window
+    they are folded into the summary by CHAT_SUMMARY_MODEL on a background
+    thread, so no chat turn waits for a summary; until the update finishes the
+    previous summary is used.
+
+    Positions are counted from the start of the conversation, so the summary
+    stays correct when leading messages are dropped from the history list
+    (see drop_leading).
+    """
+
+    def __init__(self):
+        """Initialize an empty summary."""
+        self.text: str = ""
+        self.covered: int = 0
+        self._offset: int = 0
+        self._lock = threading.Lock()
+        self._updating: bool = False
+
+    def snapshot(self):
+        """
+        Read the current summary consistently.
+
+        Returns:
+            tuple: (text, covered) where covered is the number of leading messages of
+                   the current history list the summary stands for
+        """
+        with self._lock:
+            return self.text, max(self.covered - self._offset, 0)
+
+    def drop_leading(self, count: int):
+        """
+        Account for messages removed from the start of the history list.
+
+        Args:
+            count (int): Number of removed messages
+        """
+        with self._lock:
+            self._offset += count
+
+    def request_update(self, history: list[dict], upto: int):
+        """
+        Start folding history[covered:upto] into the summary, unless an update is running.
+
+        Args:
+            history (list[dict]): Chat messages with 'role' and 'content'
+            upto (int): Number of leading messages the summary should cover
+        """
+        with self._lock:
+            upto += self._offset
+            if self._updating or upto <= self.covered:
+                return
+            self._updating = True
+            start = max(self.covered - self._offset, 0)
+            previous_text, new_messages = self.text, list(history[start:upto - self._offset])
+
+        _summary_executor.submit(self._update, previous_text, new_messages, upto)
+
+    def _update(self, previous_text: str, new_messages: list[dict], upto: int):
+        """
+        Summarize the previous summary and the new messages into a new summary.
+
+        Args:
+            previous_text (str): Summary the update starts from
+            new_messages (list[dict]): Messages to fold in
+            upto (int): Number of messages since the start of the conversation covered afterwards
+        """
+        try:
+            transcript = "\n".join(f"{message['role']}: {_clean_content(message['content'])}" for message in new_messages)
+            completion = get_OpenAI().chat.completions.create(
+                model=CHAT_SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": chat_summary},
+                    {"role": "user", "content": f"Current summary:\n{previous_text or '(empty)'}\n\nNew messages:\n{transcript}"}
+                ],
+                max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+                temperature=0.2
+            )
+            text = (completion.choices[0].message.content or "").strip()
+            with self._lock:
+                self.text = truncate_to_tokens(text, CHAT_SUMMARY_MAX_TOKENS)
+                self.covered = upto
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._updating = False
+
+
+def build_chat_context(history: list[dict], prompt: str, system_prompt: str, summary: RollingSummary, budget: int = CHAT_CONTEXT_TOKEN_BUDGET) -> list[dict]:
+    """
+    Build the messages of a chat request within a token budget.
+
+    Args:
+        history (list[dict]): Earlier chat messages with 'role' and 'content', oldest first
+        prompt (str): The user's new message
+        system_prompt (str): Instructions sent as the system message
+        summary (RollingSummary): Rolling summary of this conversation
+        budget (int, optional): Maximum prompt tokens. Defaults to CHAT_CONTEXT_TOKEN_BUDGET.
+
+    Returns:
+        list[dict]: System message, summary of older turns (if any), the most recent
+                    history messages that fit and the new user message
+
+    History messages are stripped of HTML and capped at CHAT_MESSAGE_MAX_TOKENS,
+    then added newest first until the budget is used up. Messages left out of
+    the window are handed to the rolling summary, so the request size stays
+    bounded however long the conversation runs.
+    """
+    summary_text, covered = summary.snapshot()
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if summary_text:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation: {summary_text}"})
+    remaining = budget - sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+    remaining -= count_tokens(prompt) + MESSAGE_OVERHEAD_TOKENS
+
+    window = []
+    for message in reversed(history[covered:]):
+        content = _clean_content(message["content"])
+        cost = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        if cost > remaining:
+            break
+        window.append({"role": message["role"], "content": content})
+        remaining -= cost
+    window.reverse()
+
+    window_start = len(history) - len(window)
+    if window_start > covered:
+        summary.request_update(history, window_start)
+
+    return messages + window + [{"role": "user", "content": prompt}]
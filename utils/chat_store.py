@@ -0,0 +1,72 @@
+"""
+This file contains the persistent FoodBot conversation store of signed-in users.
+"""
+
+import time
+
+from utils import db
+from utils.user_repository import migrate
+
+
+def add_message(username: str, role: str, content: str) -> int:
+    """
+    Store a chat message of a user.
+
+    Args:
+        username (str): Owner of the conversation
+        role (str): Message sender role ('user' or 'assistant')
+        content (str): Message content
+
+    Returns:
+        int: Id of the stored message, increasing with every message
+    """
+    migrate()
+    with db.transaction() as conn:
+        cursor = conn.execute('INSERT INTO chat_messages (username, role, content, created_at) VALUES (?, ?, ?, ?)',
+                              (username, role, content, time.time()))
+    return cursor.lastrowid
+
+
+def load_messages(username: str, limit: int, before_id: int = None) -> list[dict]:
+    """
+    Load a page of a user's chat messages.
+
+    Args:
+        username (str): Owner of the conversation
+        limit (int): Maximum number of messages
+        before_id (int, optional): Only load messages older than this id. Defaults to the newest messages.
+
+    Returns:
+        list[dict]: Messages with 'id', 'role' and 'content', oldest first
+    """
+    query = 'SELECT id, role, content FROM chat_messages WHERE username = ?'
+    params = [username]
+    if before_id is not None:
+        query += ' AND id < ?'
+        params.append(before_id)
+    query += ' ORDER BY id DESC LIMIT ?'
+    params.append(limit)
+
+    migrate()
+    rows = db.query_all(query, tuple(params))
+    return [{"id": row[0], "role": row[1], "content": row[2]} for row in reversed(rows)]
+
+
+def count_messages(username: str, before_id: int = None) -> int:
+    """
+    Count a user's stored chat messages.
+
+    Args:
+        username (str): Owner of the conversation
+        before_id (int, optional): Only count messages older than this id
+
+    Returns:
+        int: Number of messages
+    """
+    migrate()
+    if before_id is None:
+        row = db.query_one('SELECT COUNT(*) FROM chat_messages WHERE username = ?', (username,))
+    else:
+        row = db.query_one('SELECT COUNT(*) FROM chat_messages WHERE username = ? AND id < ?', (username, before_id))
+    return row[0]
+
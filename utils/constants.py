@@ -54,4 +54,94 @@ articles = [
 ]
 
 # global variable
-expander_loaded = True
\ No newline at end of file
+expander_loaded = True
+
+# Google Maps API
+MAPS_MAX_WORKERS = 5  # max concurrent Place Details/photo lookups, keep under the Maps QPS quota
+
+# Outbound HTTP (utils/http_client.py)
+HTTP_CONNECT_TIMEOUT = 3.05  # seconds
+HTTP_READ_TIMEOUT = 15  # seconds
+HTTP_RETRIES = 3  # retries on connection errors, 429 and 5xx
+HTTP_BACKOFF_FACTOR = 0.5  # seconds, doubled on every retry before jitter is added
+HTTP_POOL_CONNECTIONS = 10  # hosts with a kept-alive connection pool
+HTTP_MAX_CONCURRENCY_PER_HOST = 8  # concurrent requests (and pooled connections) per host
+
+# Caching
+CACHE_DB_FILE = ".cache/eatdentify_cache.db"  # SQLite file shared by all sessions of the app
+TEXT_SEARCH_CACHE_TTL = 15 * 60  # seconds, opening hours in the cached results go stale quickly
+TEXT_SEARCH_CACHE_MAX_ENTRIES = 500
+CACHE_REFRESH_WORKERS = 2  # background threads refreshing stale cache entries
+CACHE_TOUCH_INTERVAL = 60  # seconds between writes of an entry's last use, hits in between stay read-only
+PLACE_DETAILS_CACHE_TTL = 24 * 60 * 60  # seconds a place's reviews and photos are served as fresh
+PLACE_DETAILS_CACHE_STALE_TTL = 7 * 24 * 60 * 60  # further seconds they are served while refreshing
+PLACE_DETAILS_CACHE_MAX_BYTES = 50 * 1024 * 1024
+PHOTO_URL_CACHE_TTL = 12 * 60 * 60  # seconds a resolved photo URL is reused
+PHOTO_URL_CACHE_MAX_ENTRIES = 5000
+GEOCODE_CACHE_TTL = 30 * 24 * 60 * 60  # seconds, city and country of a grid cell rarely change
+GEOCODE_CACHE_MAX_ENTRIES = 10000
+GEOCODE_GEOHASH_PRECISION = 6  # geohash length of the location grid, 6 is about 1.2km x 0.6km
+ARTICLE_CACHE_TTL = 6 * 60 * 60  # seconds an article card is shown without revalidating it
+ARTICLE_CACHE_STALE_TTL = 30 * 24 * 60 * 60  # further seconds it is shown while revalidating
+ARTICLE_FAILURE_CACHE_TTL = 15 * 60  # seconds a failed or empty article page is not fetched again
+ARTICLE_FAILURE_CACHE_MAX_ENTRIES = 1000
+ARTICLE_MAX_WORKERS = 6  # concurrent article downloads
+ARTICLE_MAX_BYTES = 512 * 1024  # hard cap on the bytes read from an article page
+ARTICLE_CHUNK_SIZE = 16 * 1024
+
+# Photo store, thumbnails are served through Streamlit static file serving (.streamlit/config.toml)
+PHOTO_STORE_DIR = "static/photos"
+PHOTO_STORE_URL = "app/static/photos"
+PHOTO_STORE_MAX_BYTES = 200 * 1024 * 1024
+PHOTO_SOURCE_WIDTH = 800  # width requested from the Place Photo API before shrinking
+PHOTO_THUMBNAIL_MAX_EDGE = 400
+PHOTO_THUMBNAIL_FORMAT = "JPEG"  # "JPEG" or "WEBP"
+PHOTO_THUMBNAIL_QUALITY = 80
+PHOTO_THUMBNAIL_INDEX_TTL = 7 * 24 * 60 * 60  # seconds a photo_reference keeps pointing at its thumbnail
+PHOTO_THUMBNAIL_INDEX_MAX_ENTRIES = 20000  # photo_reference -> thumbnail entries; the files are bounded by PHOTO_STORE_MAX_BYTES
+
+# Restaurant selection
+RESTAURANT_SELECTION_LIMIT = 5  # max restaurants analysed per search
+RESTAURANT_SELECTION_STRATEGY = "random"  # one of "random", "top_rating", "top_reviews", "diverse"
+RESTAURANT_SELECTION_SEED = None  # set an int for reproducible "random"/"diverse" selection
+
+# LLM
+GEMINI_MODEL = 'gemini-1.5-flash'
+LLM_CACHE_TTL = 24 * 60 * 60  # seconds an identical prompt is answered from the cache
+LLM_CACHE_MAX_BYTES = 100 * 1024 * 1024
+COMBINED_RESTAURANT_ANALYSIS = True  # one structured call for reason and meal instead of two
+STREAM_RESTAURANT_OUTPUT = False  # show cards while reasons are generated, at the cost of a second Gemini call (and review upload) per restaurant
+LLM_MAX_WORKERS = 5  # concurrent Gemini requests of one search, besides its streamed reasons (one per restaurant)
+STREAM_REFRESH_INTERVAL = 0.1  # seconds between updates of the streamed restaurant cards
+
+# Search pipeline
+PIPELINE_BACKEND = "async"  # "async" runs all I/O of a search on one event loop, "threads" uses thread pools
+SEARCH_TIMEOUT = 120  # seconds before a running async search is cancelled
+
+# Vision
+VISION_IMAGE_MAX_EDGE = 1024  # longest edge of images sent to the vision model
+VISION_IMAGE_FORMAT = "JPEG"  # "JPEG" or "WEBP"
+VISION_IMAGE_QUALITY = 85
+VISION_PAYLOAD_CACHE_MAX_ENTRIES = 16  # encoded images kept in memory for repeated requests
+COMBINED_NUTRITION_ANALYSIS = True  # one structured vision call for report and macros instead of two
+IMAGE_ANALYSIS_CACHE_TTL = 7 * 24 * 60 * 60  # seconds an analysis of the same-looking image is reused
+IMAGE_ANALYSIS_CACHE_MAX_ENTRIES = 2000
+IMAGE_HASH_MAX_DISTANCE = 3  # differing perceptual hash bits still treated as the same image
+IMAGE_HASH_BUCKET_SIZE = 50  # hashes remembered per hash chunk index entry
+
+# FoodBot
+CHAT_MODEL = "gpt-4o"
+STREAM_CHAT_RESPONSES = True  # write FoodBot answers into the chat bubble as they are generated
+CHAT_PAGE_SIZE = 20  # chat messages rendered on each rerun, older ones are loaded on demand
+CHAT_SESSION_TAIL = 50  # chat messages kept in session memory, older ones of signed-in users stay on disk
+CHAT_CONTEXT_TOKEN_BUDGET = 2000  # prompt tokens of system prompt, summary, history and question
+CHAT_MESSAGE_MAX_TOKENS = 400  # longer history messages (e.g. nutrition reports) are truncated
+CHAT_TOKENIZER_ENCODING = "o200k_base"  # tiktoken encoding of CHAT_MODEL, used if tiktoken is installed
+CHAT_SUMMARY_MODEL = "gpt-4o-mini"  # cheap model folding older turns into the rolling summary
+CHAT_SUMMARY_MAX_TOKENS = 250
+
+# Database
+USERS_DB_FILE = "users.db"
+DB_BUSY_TIMEOUT = 10  # seconds a write waits for another session's write before failing
+DB_CACHED_STATEMENTS = 128  # prepared statements reused per connection
+DB_POOL_SIZE = 8  # connections to the users database shared by all sessions of the process
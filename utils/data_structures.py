@@ -1,9 +1,15 @@
-from typing import Dict
+from typing import Dict, TypedDict
+from dataclasses import dataclass, field, fields
+import json
 import streamlit as st
 """
 This file contains the data structures used in the application.
 """
 
+# Version of the Restaurant/RestaurantResult serialization format, stored in
+# every serialized result so that older payloads can be recognized
+RESULT_SCHEMA_VERSION = 1
+
 class Article:
     """
     Represents a food-related article with metadata and user interaction features.
@@ -121,36 +127,106 @@ class Input:
         """
         return f"fulfil this requirement {self.remarks}, I am searching for {self.cuisine} cuisine, craving for {self.craving}"
 
+class RestaurantAnalysis(TypedDict):
+    """
+    Response schema of the combined restaurant analysis LLM call.
+
+    Holds the recommendation reasoning together with the suggested meal,
+    its review citation and its description.
+    """
+    reason: str
+    meal: str
+    meal_citation: str
+    meal_description: str
+
+class MealAnalysis(TypedDict):
+    """
+    Response schema of the meal-only LLM call of a restaurant.
+
+    Holds the suggested meal, its review citation and its description, for
+    searches that generate the recommendation reasoning separately.
+    """
+    meal: str
+    meal_citation: str
+    meal_description: str
+
+class NutritionAnalysis(TypedDict):
+    """
+    Response schema of the single-call nutrition analysis of a food image.
+
+    Holds whether the image shows a single dish, the markdown nutrition
+    report and the macronutrients in grams for the charts.
+    """
+    single_dish: bool
+    report: str
+    protein_grams: float
+    carbs_grams: float
+    fat_grams: float
+
+@dataclass(slots=True)
 class Restaurant:
     """
     Represents a single restaurant with comprehensive information and AI analysis.
     
     Stores restaurant data from Google Maps API along with AI-generated
     recommendations, meal suggestions, and custom analysis fields.
+    Instances are slotted, which keeps the results held in every session's
+    state small, and convert to plain dicts with to_dict/from_dict.
+
+    Attributes:
+        place_id (str): Google Places API unique identifier
+        name (str): Restaurant name
+        rating (str): Restaurant rating (e.g., "4.5")
+        address (str): Formatted restaurant address
+        
+    The remaining fields start empty and are filled in by the search pipeline.
     """
 
-    def __init__(self, place_id: str, name: str, rating: str, address: str):
+    place_id: str
+    name: str
+    rating: str
+    address: str
+    reviews: str = ""
+    photo: str = ""
+    photo_reference: str = ""
+    photo_resolved: bool = False
+    restaurant_reason: str = ""
+    meal: str = ""
+    meal_citation: str = ""
+    meal_description: str = ""
+    custom_field: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the restaurant to a JSON-serializable dict.
+        
+        Returns:
+            dict: Field values by field name; fields still at their empty default are left out
+        """
+        data = {}
+        for each_field in fields(self):
+            value = getattr(self, each_field.name)
+            if value or each_field.name in ("place_id", "name", "rating", "address"):
+                data[each_field.name] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Restaurant":
         """
-        Initialize a Restaurant object with basic information.
+        Create a restaurant from a dict made by to_dict.
         
         Args:
-            place_id (str): Google Places API unique identifier
-            name (str): Restaurant name
-            rating (str): Restaurant rating (e.g., "4.5")
-            address (str): Formatted restaurant address
-        """
-        self.place_id: str = place_id
-        self.name: str = name
-        self.rating: str = rating
-        self.reviews: str = ""
-        self.photo: str = ""
-        self.restaurant_reason: str = ""
-        self.meal: str = ""
-        self.meal_citation: str = ""
-        self.meal_description: str = ""
-        self.custom_field: Dict[str, str] = {}
-        self.address: str = address
-    
+            data (dict): Field values by field name
+            
+        Returns:
+            Restaurant: The restaurant; unknown keys are ignored
+        """
+        names = {each_field.name for each_field in fields(cls)}
+        values = {key: value for key, value in data.items() if key in names}
+        if "custom_field" in values:
+            values["custom_field"] = dict(values["custom_field"])
+        return cls(**values)
+
 
     def get_address(self) -> str:
         """Get the formatted restaurant address."""
@@ -183,17 +259,35 @@ class Restaurant:
 
     def set_photo(self, photo: str):
         """
-        Set the restaurant's photo URL.
+        Set the restaurant's photo URL and mark the photo as resolved.
         
         Args:
-            photo (str): URL of the restaurant's photo
+            photo (str): URL of the restaurant's photo, '' if it could not be resolved
         """
         self.photo = photo
+        self.photo_resolved = True
 
     def get_photo(self) -> str:
         """Get the restaurant's photo URL."""
         return self.photo
 
+    def is_photo_resolved(self) -> bool:
+        """Whether resolving the photo was already attempted, so a failed photo is not requested again."""
+        return self.photo_resolved
+
+    def set_photo_reference(self, photo_reference: str):
+        """
+        Set the Google Places photo reference used to resolve the photo URL later.
+        
+        Args:
+            photo_reference (str): Photo reference ID from Google Places API
+        """
+        self.photo_reference = photo_reference
+
+    def get_photo_reference(self) -> str:
+        """Get the Google Places photo reference of the restaurant's photo."""
+        return self.photo_reference
+
     def add_restaurant_reason(self,reason: str):
         """
         Add AI-generated reasoning for why this restaurant was recommended.
@@ -272,7 +366,11 @@ class RestaurantResult:
     
     Processes Google Maps API results and creates Restaurant objects for
     selected establishments based on random sampling or filtering criteria.
+    Results serialize to versioned JSON (see to_json), so they can be
+    stored, cached or handed to another thread or process as plain text.
     """
+
+    __slots__ = ("restaurant_result",)
     
     def __init__(self, filtered_result, random_index: list[int]):
         """
@@ -290,10 +388,10 @@ class RestaurantResult:
         for each_index in random_index:
           each_output = filtered_result[each_index]
           self.restaurant_result.append(Restaurant(
-            name=f"{each_output['name']}",
-            place_id=f"{each_output['place_id']}",
-            rating=f"{each_output['rating']}",
-            address=f"{each_output['formatted_address']}"
+            name=str(each_output['name']),
+            place_id=str(each_output['place_id']),
+            rating=str(each_output['rating']),
+            address=str(each_output['formatted_address'])
           ))
 
     def update_list(self, restaurant_result: list[Restaurant]) :
@@ -321,4 +419,60 @@ class RestaurantResult:
         Returns:
             int: Number of restaurants in the collection
         """
-        return len(self.restaurant_result)
\ No newline at end of file
+        return len(self.restaurant_result)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the results to a JSON-serializable dict.
+        
+        Returns:
+            dict: 'version' (RESULT_SCHEMA_VERSION) and 'restaurants', see Restaurant.to_dict
+        """
+        return {
+            "version": RESULT_SCHEMA_VERSION,
+            "restaurants": [restaurant.to_dict() for restaurant in self.restaurant_result]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RestaurantResult":
+        """
+        Create results from a dict made by to_dict.
+        
+        Args:
+            data (dict): Serialized results
+            
+        Returns:
+            RestaurantResult: The results
+            
+        Raises:
+            ValueError: If the data was written by a newer schema version
+        """
+        version = data.get("version", RESULT_SCHEMA_VERSION)
+        if version > RESULT_SCHEMA_VERSION:
+            raise ValueError(f"Unsupported restaurant result schema version {version}")
+
+        result = cls({}, [])
+        result.update_list([Restaurant.from_dict(each_restaurant) for each_restaurant in data.get("restaurants", [])])
+        return result
+
+    def to_json(self) -> str:
+        """
+        Serialize the results to compact JSON.
+        
+        Returns:
+            str: JSON text of to_dict
+        """
+        return json.dumps(self.to_dict(), separators=(',', ':'), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> "RestaurantResult":
+        """
+        Create results from JSON made by to_json.
+        
+        Args:
+            text (str): JSON text
+            
+        Returns:
+            RestaurantResult: The results
+        """
+        return cls.from_dict(json.loads(text))
@@ -0,0 +1,145 @@
+"""
+This file contains the SQLite data layer of the users database, safe to use from every Streamlit session thread.
+utils.cache borrows its connections to the cache database from the same pools.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from utils.constants import USERS_DB_FILE, DB_BUSY_TIMEOUT, DB_CACHED_STATEMENTS, DB_POOL_SIZE
+
+_pools_lock = threading.Lock()
+_pools: dict = {}
+
+
+def _pool(path: str) -> queue.LifoQueue:
+    """
+    Get the connection pool of a database, creating it on first use.
+
+    Args:
+        path (str): SQLite database file
+
+    Returns:
+        queue.LifoQueue: DB_POOL_SIZE entries, each an open connection or None for one not opened yet
+    """
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = queue.LifoQueue()
+            for _ in range(DB_POOL_SIZE):
+                pool.put(None)
+        return pool
+
+
+def _open(path: str) -> sqlite3.Connection:
+    """
+    Open a pooled connection.
+
+    Args:
+        path (str): SQLite database file
+
+    Returns:
+        sqlite3.Connection: Autocommit connection in WAL mode with foreign keys enforced, usable from any thread
+    """
+    conn = sqlite3.connect(path, timeout=DB_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False,
+                           cached_statements=DB_CACHED_STATEMENTS)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    # SQLite ignores REFERENCES clauses, e.g. ON DELETE CASCADE, unless enabled per connection
+    conn.execute('PRAGMA foreign_keys=ON')
+    return conn
+
+
+@contextmanager
+def connection(path: str = USERS_DB_FILE):
+    """
+    Check out a connection of the process-wide pool for one operation.
+
+    Args:
+        path (str, optional): SQLite database file. Defaults to USERS_DB_FILE.
+
+    Yields:
+        sqlite3.Connection: Autocommit connection in WAL mode, returned to the pool afterwards
+
+    Raises:
+        sqlite3.OperationalError: If no connection is free within DB_BUSY_TIMEOUT seconds
+
+    Streamlit runs every rerun of a session on a new thread, so connections
+    are pooled per process rather than per thread: at most DB_POOL_SIZE are
+    opened, each once, and each keeps up to DB_CACHED_STATEMENTS prepared
+    statements across reruns and sessions. Readers never wait for a writer
+    in WAL mode, and writers queue on SQLite's busy timeout.
+    """
+    pool = _pool(path)
+    try:
+        conn = pool.get(timeout=DB_BUSY_TIMEOUT)
+    except queue.Empty:
+        raise sqlite3.OperationalError(f"No free database connection within {DB_BUSY_TIMEOUT} seconds") from None
+
+    try:
+        if conn is None:
+            conn = _open(path)
+        yield conn
+    finally:
+        if conn is not None and conn.in_transaction:
+            conn.rollback()
+        pool.put(conn)
+
+
+@contextmanager
+def transaction(path: str = USERS_DB_FILE):
+    """
+    Run several statements as one write transaction.
+
+    Args:
+        path (str, optional): SQLite database file. Defaults to USERS_DB_FILE.
+
+    Yields:
+        sqlite3.Connection: A pooled connection, inside the transaction
+
+    The transaction takes the write lock up front (BEGIN IMMEDIATE), so a
+    concurrent writer waits for it instead of failing halfway through. It is
+    committed when the block ends and rolled back if the block raises.
+    """
+    with connection(path) as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+
+def query_one(sql: str, params: tuple = (), path: str = USERS_DB_FILE):
+    """
+    Run a query and fetch its first row.
+
+    Args:
+        sql (str): SQL query with ? placeholders
+        params (tuple, optional): Values of the placeholders
+        path (str, optional): SQLite database file. Defaults to USERS_DB_FILE.
+
+    Returns:
+        tuple or None: The first row, or None if the query returned no rows
+    """
+    with connection(path) as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+def query_all(sql: str, params: tuple = (), path: str = USERS_DB_FILE) -> list:
+    """
+    Run a query and fetch all rows.
+
+    Args:
+        sql (str): SQL query with ? placeholders
+        params (tuple, optional): Values of the placeholders
+        path (str, optional): SQLite database file. Defaults to USERS_DB_FILE.
+
+    Returns:
+        list: Rows as tuples
+    """
+    with connection(path) as conn:
+        return conn.execute(sql, params).fetchall()
@@ -2,8 +2,24 @@ import streamlit as st
 import pandas as pd
 import os
 import requests
-from utils.utils import preprocess_restaurant_name
+from concurrent.futures import ThreadPoolExecutor
+from utils.utils import preprocess_restaurant_name, geohash_encode
 from utils.data_structures import Input
+from utils.cache import PersistentCache, make_key
+from utils import http_client
+from utils.constants import MAPS_MAX_WORKERS, TEXT_SEARCH_CACHE_TTL, TEXT_SEARCH_CACHE_MAX_ENTRIES, PLACE_DETAILS_CACHE_TTL, PLACE_DETAILS_CACHE_STALE_TTL, PLACE_DETAILS_CACHE_MAX_BYTES, PHOTO_URL_CACHE_TTL, PHOTO_URL_CACHE_MAX_ENTRIES, GEOCODE_CACHE_TTL, GEOCODE_CACHE_MAX_ENTRIES, GEOCODE_GEOHASH_PRECISION
+
+# Text Search results shared by every session, see text_search_cache.stats() for hit/miss counters
+text_search_cache = PersistentCache("text_search", ttl=TEXT_SEARCH_CACHE_TTL, max_entries=TEXT_SEARCH_CACHE_MAX_ENTRIES)
+
+# Place Details (reviews and photo references) keyed by place_id, served stale while refreshing
+details_cache = PersistentCache("place_details", ttl=PLACE_DETAILS_CACHE_TTL, stale_ttl=PLACE_DETAILS_CACHE_STALE_TTL, max_bytes=PLACE_DETAILS_CACHE_MAX_BYTES)
+
+# Resolved photo URLs keyed by photo_reference and width
+photo_url_cache = PersistentCache("photo_urls", ttl=PHOTO_URL_CACHE_TTL, max_entries=PHOTO_URL_CACHE_MAX_ENTRIES)
+
+# Reverse geocoding results keyed by the geohash cell of the coordinates
+geocode_cache = PersistentCache("geocode", ttl=GEOCODE_CACHE_TTL, max_entries=GEOCODE_CACHE_MAX_ENTRIES)
 
 def get_location_info(lat, lon):
     """
@@ -19,7 +35,15 @@ def get_location_info(lat, lon):
     Uses Google Maps Geocoding API to reverse geocode coordinates into
     human-readable location information. Extracts locality (city) and
     country from the address components.
+    
+    Results are cached per geohash cell of GEOCODE_GEOHASH_PRECISION characters,
+    so reruns and small movements within the cell do not call the API again.
     """
+    cell = geohash_encode(lat, lon, GEOCODE_GEOHASH_PRECISION)
+    cached_location = geocode_cache.get(cell)
+    if cached_location is not None:
+        return tuple(cached_location)
+
     api_key = os.environ["GOOGLE_MAPS_API_KEY"]
     base_url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {
@@ -28,7 +52,7 @@ def get_location_info(lat, lon):
     }
 
     try:
-        response = requests.get(base_url, params=params)
+        response = http_client.get(base_url, params=params)
         response.raise_for_status()
         data = response.json()
 
@@ -41,6 +65,7 @@ def get_location_info(lat, lon):
                 if "country" in component["types"]:
                     country = component["long_name"]
 
+            geocode_cache.set(cell, [city, country])
             return city, country
         else:
             st.error(f"Geocoding API error: {data['status']}")
@@ -60,8 +85,55 @@ def _get_photo_url(photo_reference, max_width=400):
     Returns:
         str: Complete URL for accessing the photo from Google Places API
         
-    Private helper function that constructs the proper Google Places Photo API
-    URL with the required parameters including API key and photo dimensions.
+    Private helper function kept for existing callers, see resolve_photo_url.
+    """
+    return resolve_photo_url(photo_reference, max_width)
+
+def resolve_photo_url(photo_reference: str, max_width: int = 400) -> str:
+    """
+    Resolve a Google Places photo reference into the photo's public URL.
+    
+    Args:
+        photo_reference (str): Photo reference ID from Google Places API
+        max_width (int, optional): Maximum width for the photo. Defaults to 400.
+        
+    Returns:
+        str: URL of the photo, or an empty string if it could not be resolved
+        
+    The Place Photo endpoint answers with a redirect to the image. Only the
+    redirect target is read (the image itself is never downloaded), so the API
+    key stays out of the page. Results are memoized in photo_url_cache by
+    photo_reference and width.
+    """
+    if not photo_reference:
+        return ""
+
+    cache_key = f"{photo_reference}:{max_width}"
+    photo_url = photo_url_cache.get(cache_key)
+    if photo_url is not None:
+        return photo_url
+
+    base_url, params = photo_request(photo_reference, max_width)
+    try:
+        with http_client.get(base_url, params=params, allow_redirects=False, stream=True) as response:
+            photo_url = response.headers.get("Location", "") if response.is_redirect else ""
+    except requests.exceptions.RequestException:
+        return ""
+
+    if photo_url:
+        photo_url_cache.set(cache_key, photo_url)
+    return photo_url
+
+def photo_request(photo_reference: str, max_width: int = 400):
+    """
+    Build a Place Photo request.
+    
+    Args:
+        photo_reference (str): Photo reference ID from Google Places API
+        max_width (int, optional): Maximum width for the photo. Defaults to 400.
+        
+    Returns:
+        tuple: (url, params) of the request, whose answer redirects to the photo
     """
     api_key = os.environ["GOOGLE_MAPS_API_KEY"]
     base_url = "https://maps.googleapis.com/maps/api/place/photo"
@@ -70,8 +142,7 @@ def _get_photo_url(photo_reference, max_width=400):
         "photo_reference": photo_reference,
         "key": api_key
     }
-    response = requests.get(base_url, params=params)
-    return response.url
+    return base_url, params
 
 def gmaps_text_search(search_prompt: str, input: Input):
     """
@@ -89,36 +160,111 @@ def gmaps_text_search(search_prompt: str, input: Input):
     - Rating range filtering (min/max ratings)
     - Open now status (only returns currently open restaurants)
     - Validates that results have required fields (rating, opening_hours)
+    
+    Identical searches within TEXT_SEARCH_CACHE_TTL are served from a cache
+    shared by all sessions instead of calling the API again.
     """
-    api_key = os.environ["GOOGLE_MAPS_API_KEY"]
-    base_url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+    min_rating = input.get_min_rating()
+    max_rating = input.get_max_rating()
     filtered_results = []
 
-    params = {
-        "query": search_prompt,
-        "radius": input.get_radius(),
-        "key": api_key,
-        "minRating": input.get_min_rating(),
-        "maxRating": input.get_max_rating()
-    }
+    results = _text_search(search_prompt, input.get_radius(), min_rating, max_rating)
+    if results:
+        filtered_results = filter_text_search_results(results, min_rating, max_rating)
+
+    else:
+        st.toast('search map error')
 
-    response = requests.get(base_url, params=params)
+    return filtered_results
+
+def filter_text_search_results(results: list, min_rating: int, max_rating: int) -> list:
+    """
+    Keep the open restaurants within the rating window.
+    
+    Args:
+        results (list): Raw result dictionaries of a Text Search
+        min_rating (int): Minimum rating filter
+        max_rating (int): Maximum rating filter
+        
+    Returns:
+        list: Results having a rating and opening hours, rated within the window and open now
+    """
+    return [
+        place for place in results
+        if 'rating' in place and 'opening_hours' in place and min_rating <= place['rating'] <= max_rating and place['opening_hours']['open_now']
+    ]
+
+def _text_search(search_prompt: str, radius: float, min_rating: int, max_rating: int):
+    """
+    Run a Google Places Text Search, answering repeated searches from text_search_cache.
+    
+    Args:
+        search_prompt (str): Search query text for finding restaurants
+        radius (float): Search radius in meters
+        min_rating (int): Minimum rating filter
+        max_rating (int): Maximum rating filter
+        
+    Returns:
+        list or None: Raw result dictionaries, or None if the search failed
+        
+    The cache key uses the whitespace- and case-normalized query together with
+    the radius and rating window, so equivalent searches share one entry.
+    """
+    cache_key = text_search_key(search_prompt, radius, min_rating, max_rating)
+    cached_results = text_search_cache.get(cache_key)
+    if cached_results is not None:
+        return cached_results
+
+    base_url, params = text_search_request(search_prompt, radius, min_rating, max_rating)
+    response = http_client.get(base_url, params=params)
     response.raise_for_status()
     data = response.json()
     if data["status"] == "OK" and data["results"]:
+        text_search_cache.set(cache_key, data["results"])
+        return data["results"]
 
-        min_rating = input.get_min_rating()
-        max_rating = input.get_max_rating()
+    return None
 
-        filtered_results = [
-            place for place in data["results"]
-            if 'rating' in place and 'opening_hours' in place and min_rating <= place['rating'] <= max_rating and place['opening_hours']['open_now']
-        ]
+def text_search_key(search_prompt: str, radius: float, min_rating: int, max_rating: int) -> str:
+    """
+    Build the text_search_cache key of a search.
+    
+    Args:
+        search_prompt (str): Search query text for finding restaurants
+        radius (float): Search radius in meters
+        min_rating (int): Minimum rating filter
+        max_rating (int): Maximum rating filter
+        
+    Returns:
+        str: Key shared by all searches that differ only in whitespace or case
+    """
+    normalized_prompt = " ".join(search_prompt.lower().split())
+    return make_key(normalized_prompt, radius, min_rating, max_rating)
 
-    else:
-        st.toast('search map error')
+def text_search_request(search_prompt: str, radius: float, min_rating: int, max_rating: int):
+    """
+    Build a Text Search request.
+    
+    Args:
+        search_prompt (str): Search query text for finding restaurants
+        radius (float): Search radius in meters
+        min_rating (int): Minimum rating filter
+        max_rating (int): Maximum rating filter
+        
+    Returns:
+        tuple: (url, params) of the request
+    """
+    api_key = os.environ["GOOGLE_MAPS_API_KEY"]
+    base_url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
 
-    return filtered_results
+    params = {
+        "query": search_prompt,
+        "radius": radius,
+        "key": api_key,
+        "minRating": min_rating,
+        "maxRating": max_rating
+    }
+    return base_url, params
 
 def get_review_and_photo(place_id: str):
     """
@@ -135,6 +281,83 @@ def get_review_and_photo(place_id: str):
     Uses Google Places Details API to fetch additional restaurant information
     including customer reviews and photos. Processes the first available photo
     through the photo reference system to generate accessible photo URLs.
+    Details are read through details_cache, so popular places rarely hit the API.
+    """
+    review, photo_reference = get_review_and_photo_reference(place_id)
+    return review, resolve_photo_url(photo_reference)
+
+def get_review_and_photo_reference(place_id: str):
+    """
+    Retrieve restaurant reviews and the primary photo reference, without resolving the photo.
+    
+    Args:
+        place_id (str): Google Places unique identifier for the restaurant
+        
+    Returns:
+        tuple: (review, photo_reference) where:
+            - review (str): String representation of restaurant reviews
+            - photo_reference (str): Reference of the first photo, or '' if the place has none
+    """
+    return review_and_photo_reference(get_place_details(place_id))
+
+def review_and_photo_reference(details: dict):
+    """
+    Extract the reviews and the primary photo reference from Place Details.
+    
+    Args:
+        details (dict): The 'result' object of a Place Details response
+        
+    Returns:
+        tuple: (review, photo_reference), see get_review_and_photo_reference
+    """
+    photos = details.get("photos") or [{}]
+    photo_reference = photos[0].get("photo_reference", "")
+    review = f"{details['reviews']}"
+    
+    return review, photo_reference
+
+def get_place_details(place_id: str) -> dict:
+    """
+    Get the reviews and photo references of a place from details_cache.
+    
+    Args:
+        place_id (str): Google Places unique identifier for the restaurant
+        
+    Returns:
+        dict: The 'result' object of the Place Details response
+        
+    Fresh entries are returned directly, stale entries are returned right away
+    and refreshed in the background, and misses call the Place Details API.
+    """
+    return details_cache.get_or_load(place_id, lambda: _fetch_place_details(place_id))
+
+def _fetch_place_details(place_id: str) -> dict:
+    """
+    Request the reviews and photo references of a place from the Place Details API.
+    
+    Args:
+        place_id (str): Google Places unique identifier for the restaurant
+        
+    Returns:
+        dict: The 'result' object of the Place Details response
+        
+    Raises:
+        ValueError: If the API does not return a result for the place
+    """
+    details_url, details_params = place_details_request(place_id)
+    details_response = http_client.get(details_url, params=details_params)
+    details_response.raise_for_status()
+    return parse_place_details(details_response.json())
+
+def place_details_request(place_id: str):
+    """
+    Build a Place Details request for the reviews and photo references of a place.
+    
+    Args:
+        place_id (str): Google Places unique identifier for the restaurant
+        
+    Returns:
+        tuple: (url, params) of the request
     """
     api_key = os.environ["GOOGLE_MAPS_API_KEY"]
 
@@ -145,12 +368,63 @@ def get_review_and_photo(place_id: str):
       "fields": "photos,reviews",
       "key": api_key
     }
-    details_response = requests.get(details_url, params=details_params)
-    details_data = details_response.json()
+    return details_url, details_params
 
-    photo_url = f'{_get_photo_url(details_data["result"]["photos"][0]["photo_reference"])}'
-    review = f"{details_data['result']['reviews']}"
+def parse_place_details(details_data: dict) -> dict:
+    """
+    Check a Place Details response and return its result.
     
-    return review, photo_url
+    Args:
+        details_data (dict): Decoded JSON body of the response
+        
+    Returns:
+        dict: The 'result' object of the response
+        
+    Raises:
+        ValueError: If the API does not return a result for the place
+    """
+    if details_data.get("status") != "OK":
+        raise ValueError(f"Place Details API error: {details_data.get('status')}")
 
+    return details_data["result"]
+
+
+def _try_get_review_and_photo_reference(place_id: str):
+    """
+    Wrapper around get_review_and_photo_reference that reports failures as None.
+
+    Args:
+        place_id (str): Google Places unique identifier for the restaurant
+
+    Returns:
+        tuple or None: (review, photo_reference), or None if the lookup failed
+    """
+    try:
+        return get_review_and_photo_reference(place_id)
+    except Exception:
+        return None
+
+def fetch_reviews_and_photo_references(place_ids: list[str], max_workers: int = MAPS_MAX_WORKERS) -> list:
+    """
+    Retrieve reviews and photo references for several restaurants concurrently.
+
+    Args:
+        place_ids (list[str]): Google Places identifiers of the selected restaurants
+        max_workers (int, optional): Maximum number of lookups in flight at once.
+            Defaults to MAPS_MAX_WORKERS.
+
+    Returns:
+        list: One (review, photo_reference) tuple per place_id, in the same order as
+              place_ids, or None for restaurants whose lookup failed
+
+    Runs the Place Details requests of every restaurant on a bounded thread
+    pool, so a search costs roughly one details round-trip instead of one per
+    restaurant. A failing restaurant does not affect the others. Photo URLs are
+    resolved later with utils.photo_store.get_restaurant_photo_urls, when the
+    restaurant cards are shown.
+    """
+    if not place_ids:
+        return []
 
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(place_ids)))) as executor:
+        return list(executor.map(_try_get_review_and_photo_reference, place_ids))
@@ -0,0 +1,203 @@
+"""
+This file contains the shared HTTP client used for all outbound Maps, photo and article requests.
+"""
+
+import time
+import random
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from utils.constants import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_RETRIES, HTTP_BACKOFF_FACTOR, HTTP_POOL_CONNECTIONS, HTTP_MAX_CONCURRENCY_PER_HOST
+
+_stats_lock = threading.Lock()
+_host_stats: dict = {}
+_host_semaphores: dict = {}
+
+
+def record(host: str, **values):
+    """
+    Add timing and counter values to a host's statistics.
+
+    Args:
+        host (str): Host name the values belong to
+        **values: Amounts to add, e.g. requests=1 or connect_seconds=0.12
+
+    Also called by utils.async_api, so stats covers every outbound request.
+    """
+    with _stats_lock:
+        host_stats = _host_stats.setdefault(host, {
+            "requests": 0,
+            "connections": 0,
+            "connect_seconds": 0.0,
+            "wait_seconds": 0.0,
+            "transfer_seconds": 0.0
+        })
+        for name, value in values.items():
+            host_stats[name] += value
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    """HTTP connection recording how long opening it took."""
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        record(self.host, connections=1, connect_seconds=time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    """HTTPS connection recording how long the TCP and TLS handshakes took."""
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        record(self.host, connections=1, connect_seconds=time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _JitteredRetry(Retry):
+    """Retry policy adding random jitter to the exponential backoff, so clients do not retry in lockstep."""
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff + random.uniform(0, backoff) if backoff > 0 else 0
+
+
+class _PooledAdapter(HTTPAdapter):
+    """Keep-alive adapter whose connections report their handshake time."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool
+        }
+
+
+def _create_session() -> requests.Session:
+    """
+    Create the shared session with connection pooling and the retry policy.
+
+    Returns:
+        requests.Session: Session retrying idempotent requests on connection errors, 429 and 5xx
+    """
+    retry = _JitteredRetry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = _PooledAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_MAX_CONCURRENCY_PER_HOST, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = _create_session()
+
+
+def host_semaphore(host: str) -> threading.BoundedSemaphore:
+    """
+    Get the semaphore limiting concurrent requests to a host.
+
+    Args:
+        host (str): Host name
+
+    Returns:
+        threading.BoundedSemaphore: Semaphore allowing HTTP_MAX_CONCURRENCY_PER_HOST requests
+
+    Shared with utils.async_api, so requests of both clients count against
+    the same limit.
+    """
+    with _stats_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = _host_semaphores[host] = threading.BoundedSemaphore(HTTP_MAX_CONCURRENCY_PER_HOST)
+        return semaphore
+
+
+def get(url: str, timeout=None, **kwargs) -> requests.Response:
+    """
+    Send a GET request through the shared session.
+
+    Args:
+        url (str): Request URL
+        timeout (float or tuple, optional): Timeout in seconds, or (connect, read).
+            Defaults to (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT).
+        **kwargs: Further arguments of requests.Session.get, e.g. params or headers
+
+    Returns:
+        requests.Response: The response, with the body already read unless stream=True
+
+    Reuses pooled keep-alive connections, retries connection errors, 429 and 5xx
+    responses with jittered backoff, and waits while HTTP_MAX_CONCURRENCY_PER_HOST
+    requests to the same host are in flight.
+    """
+    host = urlsplit(url).hostname or ""
+    with host_semaphore(host):
+        start = time.perf_counter()
+        response = _session.get(url, timeout=timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), **kwargs)
+        total_seconds = time.perf_counter() - start
+
+    wait_seconds = response.elapsed.total_seconds()
+    record(host, requests=1, wait_seconds=wait_seconds,
+            transfer_seconds=0.0 if kwargs.get("stream") else max(total_seconds - wait_seconds, 0.0))
+    return response
+
+
+@contextmanager
+def stream(url: str, timeout=None, **kwargs):
+    """
+    Send a streamed GET request, holding the host's concurrency slot while the body is read.
+
+    Args:
+        url (str): Request URL
+        timeout (float or tuple, optional): See get
+        **kwargs: Further arguments of requests.Session.get
+
+    Yields:
+        requests.Response: Response whose body is read by the caller, closed on exit
+    """
+    host = urlsplit(url).hostname or ""
+    with host_semaphore(host):
+        start = time.perf_counter()
+        response = _session.get(url, timeout=timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), stream=True, **kwargs)
+        wait_seconds = response.elapsed.total_seconds()
+        try:
+            yield response
+        finally:
+            response.close()
+            record(host, requests=1, wait_seconds=wait_seconds,
+                    transfer_seconds=max(time.perf_counter() - start - wait_seconds, 0.0))
+
+
+def stats() -> dict:
+    """
+    Get per-host request statistics of this process.
+
+    Returns:
+        dict: Host name to 'requests', 'connections' (new TCP/TLS handshakes),
+              'connect_seconds' (time spent in handshakes), 'wait_seconds'
+              (time until response headers, handshakes included) and
+              'transfer_seconds' (body download time)
+    """
+    with _stats_lock:
+        return {host: dict(host_stats) for host, host_stats in _host_stats.items()}
@@ -0,0 +1,120 @@
+"""
+This file contains the cache of image analyses, matching images by perceptual hash.
+"""
+
+from utils.cache import PersistentCache, make_key
+from utils.constants import IMAGE_HASH_MAX_DISTANCE, IMAGE_HASH_BUCKET_SIZE
+
+
+def hamming_distance(first_hash: str, second_hash: str) -> int:
+    """
+    Count the differing bits of two hex hashes.
+
+    Args:
+        first_hash (str): Hash as hex characters
+        second_hash (str): Hash as hex characters
+
+    Returns:
+        int: Number of differing bits
+    """
+    return bin(int(first_hash, 16) ^ int(second_hash, 16)).count("1")
+
+
+class ImageAnalysisCache:
+    """
+    Persistent cache of image analyses that also answers for near-identical images.
+
+    Entries are keyed by a 64-bit perceptual hash (see utils.utils.perceptual_hash)
+    and a context such as the prompt. Recompressing or resizing a photo can
+    flip a few bits of its hash, so lookups accept stored hashes within
+    max_distance bits. To find them without scanning, the hash is split into
+    max_distance + 1 chunks and every chunk is indexed: a hash within
+    max_distance bits always matches at least one chunk exactly.
+    """
+
+    def __init__(self, namespace: str, ttl: float, max_entries: int, max_distance: int = IMAGE_HASH_MAX_DISTANCE):
+        """
+        Initialize the cache.
+
+        Args:
+            namespace (str): Name of the analyses in the cache database
+            ttl (float): Seconds an analysis stays valid
+            max_entries (int): Maximum number of analyses, least recently used evicted first
+            max_distance (int, optional): Maximum number of differing hash bits for a match
+        """
+        self.max_distance: int = max_distance
+        self.entries = PersistentCache(namespace, ttl=ttl, max_entries=max_entries)
+        self.index = PersistentCache(f"{namespace}_index", ttl=ttl, max_entries=max_entries * (max_distance + 1))
+
+    def _chunk_keys(self, image_hash: str, context) -> list[str]:
+        """
+        Build the index keys of a hash's chunks.
+
+        Args:
+            image_hash (str): 64-bit perceptual hash as hex characters
+            context: JSON-serializable context of the analysis
+
+        Returns:
+            list[str]: One index key per chunk
+        """
+        bits = int(image_hash, 16)
+        chunk_count = self.max_distance + 1
+        bounds = [round(64 * position / chunk_count) for position in range(chunk_count + 1)]
+        return [
+            make_key(context, position, (bits >> start) & ((1 << (end - start)) - 1))
+            for position, (start, end) in enumerate(zip(bounds, bounds[1:]))
+        ]
+
+    def get(self, image_hash: str, context):
+        """
+        Look up the analysis of the same or a near-identical image.
+
+        Args:
+            image_hash (str): 64-bit perceptual hash as hex characters
+            context: JSON-serializable context of the analysis, e.g. the prompt
+
+        Returns:
+            The cached analysis, or None if no close enough image was analysed
+
+        Near matches are not counted as hits in stats.
+        """
+        analysis = self.entries.get(make_key(image_hash, context))
+        if analysis is not None:
+            return analysis
+
+        candidates = set()
+        for chunk_key in self._chunk_keys(image_hash, context):
+            candidates.update(self.index.peek(chunk_key, []))
+        candidates.discard(image_hash)
+
+        for candidate in sorted(candidates, key=lambda each_hash: hamming_distance(image_hash, each_hash)):
+            if hamming_distance(image_hash, candidate) > self.max_distance:
+                break
+            analysis = self.entries.peek(make_key(candidate, context), max_age=self.entries.ttl)
+            if analysis is not None:
+                return analysis
+        return None
+
+    def set(self, image_hash: str, context, analysis):
+        """
+        Store the analysis of an image.
+
+        Args:
+            image_hash (str): 64-bit perceptual hash as hex characters
+            context: JSON-serializable context of the analysis
+            analysis: JSON-serializable analysis to store
+        """
+        self.entries.set(make_key(image_hash, context), analysis)
+        for chunk_key in self._chunk_keys(image_hash, context):
+            hashes = self.index.peek(chunk_key, [])
+            if image_hash not in hashes:
+                self.index.set(chunk_key, (hashes + [image_hash])[-IMAGE_HASH_BUCKET_SIZE:])
+
+    def stats(self) -> dict:
+        """
+        Get hit/miss counters and size of the analyses, see PersistentCache.stats.
+
+        Returns:
+            dict: 'hits', 'stale_hits', 'misses', 'hit_ratio', 'entries' and 'bytes'
+        """
+        return self.entries.stats()
@@ -1,20 +1,319 @@
 """
 This is the file for llm client initialization.
+
+Clients are built once per process and shared by every session and thread,
+so LLM calls reuse their HTTP/gRPC connections instead of opening new ones.
 """
 
 import os
+import json
+import asyncio
+import hashlib
+import threading
 from openai import OpenAI
 
 import google.generativeai as genai
 
+from utils.cache import PersistentCache, make_key
+from utils.constants import GEMINI_MODEL, LLM_CACHE_TTL, LLM_CACHE_MAX_BYTES
+
+_lock = threading.Lock()
+_openai_client = None
+_gemini_configured = False
+_gemini_models = {}
+_warmed_up = False
+
+# Gemini responses keyed by model, generation config and prompt hash
+llm_cache = PersistentCache("llm_responses", ttl=LLM_CACHE_TTL, max_bytes=LLM_CACHE_MAX_BYTES)
+_stage_stats = {}
+
 def get_OpenAI():
-  api_key = os.environ["OPENAI_SECRET_KEY"]
-  model = OpenAI(api_key=api_key)
-  return model
+  """
+  Get the shared OpenAI client, creating it on first use.
+
+  Returns:
+      OpenAI: Thread-safe client reused for all OpenAI calls of the process
+  """
+  global _openai_client
+  if _openai_client is None:
+    with _lock:
+      if _openai_client is None:
+        api_key = os.environ["OPENAI_SECRET_KEY"]
+        _openai_client = OpenAI(api_key=api_key)
+  return _openai_client
 
-def get_Gemini():
-  api_key = os.environ["GEMINI_SECRET_KEY"]
-  genai.configure(api_key=api_key)
-  model = genai.GenerativeModel('gemini-1.5-flash')
+def get_Gemini(model_name: str = GEMINI_MODEL):
+  """
+  Get the shared Gemini model, configuring the SDK and creating the model on first use.
+
+  Args:
+      model_name (str, optional): Gemini model name. Defaults to GEMINI_MODEL.
+
+  Returns:
+      genai.GenerativeModel: Model reused for all Gemini calls of the process
+
+  genai.configure is called only once, since reconfiguring the SDK drops its
+  cached client and connection.
+  """
+  global _gemini_configured
+  model = _gemini_models.get(model_name)
+  if model is None:
+    with _lock:
+      if not _gemini_configured:
+        api_key = os.environ["GEMINI_SECRET_KEY"]
+        genai.configure(api_key=api_key)
+        _gemini_configured = True
+      model = _gemini_models.get(model_name)
+      if model is None:
+        model = _gemini_models[model_name] = genai.GenerativeModel(model_name)
   return model
 
+def warm_up_clients():
+  """
+  Create the LLM clients and open their connections in the background, once per process.
+
+  Sends a free request to each provider (listing OpenAI models, counting
+  Gemini tokens) so the first user request does not pay for client setup and
+  cold TLS handshakes. Failures are ignored; the clients are created again on
+  demand.
+  """
+  global _warmed_up
+  with _lock:
+    if _warmed_up:
+      return
+    _warmed_up = True
+
+  def warm_up():
+    try:
+      get_OpenAI().models.list()
+    except Exception:
+      pass
+    try:
+      get_Gemini().count_tokens("warm up")
+    except Exception:
+      pass
+
+  threading.Thread(target=warm_up, name="llm-warm-up", daemon=True).start()
+
+def generate_content(prompt: str, stage: str, generation_config: dict = None, model_name: str = GEMINI_MODEL, use_cache: bool = True, validate=None) -> str:
+  """
+  Generate a Gemini response, answering identical requests from llm_cache.
+
+  Args:
+      prompt (str): Full prompt text
+      stage (str): Name of the calling pipeline stage, used for per-stage hit ratios
+      generation_config (dict, optional): Gemini generation config, e.g. a JSON response schema
+      model_name (str, optional): Gemini model name. Defaults to GEMINI_MODEL.
+      use_cache (bool, optional): Set to False to always call the model. Defaults to True.
+      validate (callable, optional): Parser of the response text that raises ValueError if the
+          text is unusable; only texts it accepts are cached
+
+  Returns:
+      str: Text of the response
+
+  The cache key covers the model, the generation config and a hash of the
+  prompt, so only exactly identical requests are served from the cache.
+  With validate, a malformed response is returned to the caller but not
+  cached, so the next identical request asks the model again.
+  """
+  model = get_Gemini(model_name)
+  if not use_cache:
+    return model.generate_content(prompt, generation_config=generation_config).text
+
+  cache_key = _cache_key(prompt, generation_config, model_name)
+  text = _cached_text(cache_key, validate)
+  _record_stage(stage, hit=text is not None)
+
+  if text is None:
+    text = model.generate_content(prompt, generation_config=generation_config).text
+    if _is_valid(text, validate):
+      llm_cache.set(cache_key, text)
+  return text
+
+def generate_content_stream(prompt: str, stage: str, model_name: str = GEMINI_MODEL, use_cache: bool = True, validate=None):
+  """
+  Generate a Gemini response as a stream of text chunks, answering identical requests from llm_cache.
+
+  Args:
+      prompt (str): Full prompt text
+      stage (str): Name of the calling pipeline stage, used for per-stage hit ratios
+      model_name (str, optional): Gemini model name. Defaults to GEMINI_MODEL.
+      use_cache (bool, optional): Set to False to always call the model. Defaults to True.
+      validate (callable, optional): Parser of the response text that raises ValueError if the
+          text is unusable; only texts it accepts are cached
+
+  Yields:
+      str: Successive pieces of the response text; a cached response is yielded at once
+
+  Shares its cache entries with generate_content, the complete text is stored
+  once the stream has finished.
+  """
+  model = get_Gemini(model_name)
+  cache_key = None
+  if use_cache:
+    cache_key = _cache_key(prompt, None, model_name)
+    text = _cached_text(cache_key, validate)
+    _record_stage(stage, hit=text is not None)
+    if text is not None:
+      yield text
+      return
+
+  chunks = []
+  for chunk in model.generate_content(prompt, stream=True):
+    try:
+      text = chunk.text
+    except ValueError:
+      # chunks without text parts, e.g. the final one carrying only the finish reason
+      continue
+    chunks.append(text)
+    yield text
+
+  text = "".join(chunks)
+  if cache_key is not None and _is_valid(text, validate):
+    llm_cache.set(cache_key, text)
+
+async def generate_content_async(prompt: str, stage: str, generation_config: dict = None, model_name: str = GEMINI_MODEL, use_cache: bool = True, validate=None) -> str:
+  """
+  Coroutine version of generate_content, sharing its cache entries.
+
+  Args:
+      prompt (str): Full prompt text
+      stage (str): Name of the calling pipeline stage, used for per-stage hit ratios
+      generation_config (dict, optional): Gemini generation config, e.g. a JSON response schema
+      model_name (str, optional): Gemini model name. Defaults to GEMINI_MODEL.
+      use_cache (bool, optional): Set to False to always call the model. Defaults to True.
+      validate (callable, optional): Parser of the response text that raises ValueError if the
+          text is unusable; only texts it accepts are cached
+
+  Returns:
+      str: Text of the response
+
+  The SDK's async client is bound to the event loop it was first used on, so
+  all coroutines of this module must run on the loop of utils.async_api.
+  Cache reads and writes run on a worker thread to keep that loop free.
+  """
+  model = get_Gemini(model_name)
+  if not use_cache:
+    return (await model.generate_content_async(prompt, generation_config=generation_config)).text
+
+  cache_key = _cache_key(prompt, generation_config, model_name)
+  text = await asyncio.to_thread(_cached_text, cache_key, validate)
+  _record_stage(stage, hit=text is not None)
+
+  if text is None:
+    text = (await model.generate_content_async(prompt, generation_config=generation_config)).text
+    if _is_valid(text, validate):
+      await asyncio.to_thread(llm_cache.set, cache_key, text)
+  return text
+
+async def generate_content_stream_async(prompt: str, stage: str, model_name: str = GEMINI_MODEL, use_cache: bool = True, validate=None):
+  """
+  Coroutine version of generate_content_stream, sharing its cache entries.
+
+  Args:
+      prompt (str): Full prompt text
+      stage (str): Name of the calling pipeline stage, used for per-stage hit ratios
+      model_name (str, optional): Gemini model name. Defaults to GEMINI_MODEL.
+      use_cache (bool, optional): Set to False to always call the model. Defaults to True.
+      validate (callable, optional): Parser of the response text that raises ValueError if the
+          text is unusable; only texts it accepts are cached
+
+  Yields:
+      str: Successive pieces of the response text; a cached response is yielded at once
+  """
+  model = get_Gemini(model_name)
+  cache_key = None
+  if use_cache:
+    cache_key = _cache_key(prompt, None, model_name)
+    text = await asyncio.to_thread(_cached_text, cache_key, validate)
+    _record_stage(stage, hit=text is not None)
+    if text is not None:
+      yield text
+      return
+
+  chunks = []
+  async for chunk in await model.generate_content_async(prompt, stream=True):
+    try:
+      text = chunk.text
+    except ValueError:
+      # chunks without text parts, e.g. the final one carrying only the finish reason
+      continue
+    chunks.append(text)
+    yield text
+
+  text = "".join(chunks)
+  if cache_key is not None and _is_valid(text, validate):
+    await asyncio.to_thread(llm_cache.set, cache_key, text)
+
+def _is_valid(text: str, validate) -> bool:
+  """Check a response text with a caller's validate function; without one every text is valid."""
+  if validate is None:
+    return True
+  try:
+    validate(text)
+  except ValueError:
+    return False
+  return True
+
+def _cached_text(cache_key: str, validate):
+  """
+  Look up a cached response text, dropping an entry that fails validation.
+
+  Args:
+      cache_key (str): llm_cache key of the request
+      validate (callable): Validate function of the caller, or None
+
+  Returns:
+      str or None: The cached text, or None on a miss
+  """
+  text = llm_cache.get(cache_key)
+  if text is not None and not _is_valid(text, validate):
+    llm_cache.delete(cache_key)
+    return None
+  return text
+
+def _cache_key(prompt: str, generation_config: dict, model_name: str) -> str:
+  """Build the llm_cache key of a request from its model, generation config and prompt hash."""
+  prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+  return make_key(model_name, _describe_config(generation_config), prompt_hash)
+
+def _describe_config(generation_config: dict) -> str:
+  """
+  Describe a generation config as stable text for the cache key.
+
+  Args:
+      generation_config (dict): Gemini generation config, may contain schema classes
+
+  Returns:
+      str: JSON text in which schema classes are replaced by their field annotations
+  """
+  def describe(value):
+    annotations = getattr(value, '__annotations__', None)
+    if annotations is not None:
+      return {name: getattr(field, '__name__', str(field)) for name, field in annotations.items()}
+    return str(value)
+
+  return json.dumps(generation_config or {}, sort_keys=True, default=describe)
+
+def _record_stage(stage: str, hit: bool):
+  """Count a cache hit or miss for a pipeline stage."""
+  with _lock:
+    stage_stats = _stage_stats.setdefault(stage, {"hits": 0, "misses": 0})
+    stage_stats["hits" if hit else "misses"] += 1
+
+def llm_cache_stats() -> dict:
+  """
+  Get the LLM response cache hit ratio of each pipeline stage in this process.
+
+  Returns:
+      dict: Stage name to 'hits', 'misses' and 'hit_ratio'
+  """
+  with _lock:
+    return {
+      stage: {
+        "hits": stage_stats["hits"],
+        "misses": stage_stats["misses"],
+        "hit_ratio": stage_stats["hits"] / (stage_stats["hits"] + stage_stats["misses"])
+      }
+      for stage, stage_stats in _stage_stats.items()
+    }
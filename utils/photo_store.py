@@ -0,0 +1,203 @@
+"""
+This file contains the local photo store serving restaurant thumbnails to the restaurant cards.
+"""
+
+import os
+import io
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+
+from utils.cache import PersistentCache
+from utils import http_client
+from utils.google_map_api import resolve_photo_url
+from utils.constants import MAPS_MAX_WORKERS, PHOTO_STORE_DIR, PHOTO_STORE_URL, PHOTO_STORE_MAX_BYTES, PHOTO_SOURCE_WIDTH, PHOTO_THUMBNAIL_MAX_EDGE, PHOTO_THUMBNAIL_FORMAT, PHOTO_THUMBNAIL_QUALITY, PHOTO_THUMBNAIL_INDEX_TTL, PHOTO_THUMBNAIL_INDEX_MAX_ENTRIES
+
+_EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+
+# photo_reference -> stored thumbnail file name, the files themselves are content-addressed
+thumbnail_index = PersistentCache("photo_thumbnails", ttl=PHOTO_THUMBNAIL_INDEX_TTL, max_entries=PHOTO_THUMBNAIL_INDEX_MAX_ENTRIES)
+
+
+def get_restaurant_photo_urls(photo_references: list[str], max_workers: int = MAPS_MAX_WORKERS) -> list[str]:
+    """
+    Get displayable photo URLs for several restaurants concurrently.
+
+    Args:
+        photo_references (list[str]): Photo reference IDs from Google Places API
+        max_workers (int, optional): Maximum number of photos prepared at once
+
+    Returns:
+        list[str]: URLs in the same order as photo_references ('' where no photo is available)
+
+    Serves locally stored thumbnails where possible and falls back to the
+    Google photo URL when a thumbnail cannot be made.
+    """
+    if not photo_references:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(photo_references)))) as executor:
+        return list(executor.map(get_restaurant_photo_url, photo_references))
+
+
+def get_restaurant_photo_url(photo_reference: str) -> str:
+    """
+    Get a displayable photo URL for one restaurant photo.
+
+    Args:
+        photo_reference (str): Photo reference ID from Google Places API
+
+    Returns:
+        str: Local thumbnail URL, the Google photo URL as a fallback, or ''
+
+    Each photo is downloaded once, shrunk to PHOTO_THUMBNAIL_MAX_EDGE and stored
+    under the hash of its encoded bytes, so every session and rerun shares the
+    same file.
+    """
+    if not photo_reference:
+        return ""
+
+    thumbnail_url = get_stored_thumbnail_url(photo_reference)
+    if thumbnail_url:
+        return thumbnail_url
+
+    source_url = resolve_photo_url(photo_reference, max_width=PHOTO_SOURCE_WIDTH)
+    if not source_url:
+        return ""
+    try:
+        return download_thumbnail(photo_reference, source_url)
+    except Exception:
+        return source_url
+
+
+def download_thumbnail(photo_reference: str, source_url: str, max_edge: int = PHOTO_THUMBNAIL_MAX_EDGE) -> str:
+    """
+    Download a resolved photo and store its thumbnail.
+
+    Args:
+        photo_reference (str): Photo reference ID from Google Places API
+        source_url (str): Resolved Google photo URL, see resolve_photo_url
+        max_edge (int, optional): Longest edge of the thumbnail in pixels
+
+    Returns:
+        str: URL of the thumbnail served by Streamlit's static file serving
+
+    Raises:
+        requests.exceptions.RequestException: If the photo download failed
+    """
+    response = http_client.get(source_url)
+    response.raise_for_status()
+
+    return save_thumbnail(photo_reference, response.content, max_edge)
+
+
+def get_stored_thumbnail_url(photo_reference: str, max_edge: int = PHOTO_THUMBNAIL_MAX_EDGE) -> str:
+    """
+    Get the URL of a photo's thumbnail if it is already in the photo store.
+
+    Args:
+        photo_reference (str): Photo reference ID from Google Places API
+        max_edge (int, optional): Longest edge of the thumbnail in pixels
+
+    Returns:
+        str: URL of the stored thumbnail, or '' if it has not been made yet
+    """
+    file_name = thumbnail_index.get(_index_key(photo_reference, max_edge))
+    if file_name and _touch(os.path.join(PHOTO_STORE_DIR, file_name)):
+        return f"{PHOTO_STORE_URL}/{file_name}"
+    return ""
+
+
+def save_thumbnail(photo_reference: str, image_bytes: bytes, max_edge: int = PHOTO_THUMBNAIL_MAX_EDGE) -> str:
+    """
+    Store the thumbnail of a downloaded photo and remember it for the photo reference.
+
+    Args:
+        photo_reference (str): Photo reference ID from Google Places API
+        image_bytes (bytes): Original image file contents
+        max_edge (int, optional): Longest edge of the thumbnail in pixels
+
+    Returns:
+        str: URL of the thumbnail served by Streamlit's static file serving
+    """
+    file_name = store_thumbnail(image_bytes, max_edge)
+    thumbnail_index.set(_index_key(photo_reference, max_edge), file_name)
+    return f"{PHOTO_STORE_URL}/{file_name}"
+
+
+def _index_key(photo_reference: str, max_edge: int) -> str:
+    """Build the thumbnail_index key of a photo."""
+    return f"{photo_reference}:{max_edge}:{PHOTO_THUMBNAIL_FORMAT}"
+
+
+def store_thumbnail(image_bytes: bytes, max_edge: int = PHOTO_THUMBNAIL_MAX_EDGE) -> str:
+    """
+    Encode an image as a thumbnail and store it in the content-addressed photo store.
+
+    Args:
+        image_bytes (bytes): Original image file contents
+        max_edge (int, optional): Longest edge of the thumbnail in pixels
+
+    Returns:
+        str: File name of the stored thumbnail inside PHOTO_STORE_DIR
+    """
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_bytes)))
+    image = image.convert("RGB")
+    image.thumbnail((max_edge, max_edge))
+
+    buffered = io.BytesIO()
+    image.save(buffered, format=PHOTO_THUMBNAIL_FORMAT, quality=PHOTO_THUMBNAIL_QUALITY, optimize=True)
+    thumbnail = buffered.getvalue()
+
+    file_name = f"{hashlib.sha256(thumbnail).hexdigest()}.{_EXTENSIONS[PHOTO_THUMBNAIL_FORMAT]}"
+    path = os.path.join(PHOTO_STORE_DIR, file_name)
+    if not _touch(path):
+        os.makedirs(PHOTO_STORE_DIR, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(thumbnail)
+        os.replace(temp_path, path)
+        _evict(PHOTO_STORE_MAX_BYTES)
+
+    return file_name
+
+
+def _touch(path: str) -> bool:
+    """
+    Mark a stored thumbnail as recently used.
+
+    Args:
+        path (str): Thumbnail file path
+
+    Returns:
+        bool: True if the file exists
+    """
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        return False
+
+
+def _evict(max_bytes: int):
+    """
+    Delete the least recently used thumbnails until the store fits in max_bytes.
+
+    Args:
+        max_bytes (int): Maximum total size of the photo store
+    """
+    try:
+        entries = [entry for entry in os.scandir(PHOTO_STORE_DIR) if entry.is_file() and not entry.name.endswith(".tmp")]
+    except OSError:
+        return
+
+    stats = sorted(((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries), reverse=True)
+    total_size = 0
+    for _, size, path in stats:
+        total_size += size
+        if total_size > max_bytes:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
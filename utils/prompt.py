@@ -9,6 +9,13 @@ food_bot = """
 You are FoodBot, a knowledgeable and helpful food and restaurant assistant. You have extensive knowledge about various cuisines, cooking techniques, dietary restrictions, and food trends. Provide accurate, engaging, and concise responses to users' food-related queries. If you're unsure about something, it's okay to say so. Aim to be informative and occasionally suggest follow-up questions to engage the user further. If the users ask about meal from a specific restaurant, provide the meal name and short description of the meal. If possible, give the best seller meal from the restaurant. Politely tell that you can't answer any non-food related questions if being asked things not related to food. Provide with short answer. Don't say that you can't identify the image if not asked something related to the image.
 """
 
+chat_summary = """
+You maintain a running summary of a conversation between a user and FoodBot, a food and restaurant assistant.
+Update the summary with the new messages. Keep what matters for future answers: the user's preferences, dietary restrictions,
+dishes, restaurants and recipes discussed, and open questions. Drop greetings, formatting and details that are no longer relevant.
+Write plain text, at most 150 words, no preamble.
+"""
+
 nutrition = """
 Analyse the image, provide a simple nutritional breakdown. Include:
 1. Estimated calories
@@ -21,6 +28,21 @@ Present the information in a concise, easy-to-read format using markdown and inc
 Only if the image is more that one dish, return 'None'.
 """
 
+nutrition_analysis = """
+Analyse the image and answer with a JSON object containing the keys "single_dish", "report", "protein_grams", "carbs_grams" and "fat_grams".
+
+"single_dish": false if the image shows more than one dish, otherwise true.
+"report": a simple nutritional breakdown of the dish. Include:
+1. Estimated calories
+2. Macronutrients (protein, carbohydrates, fat)
+2. Key vitamins and minerals
+3. Any potential allergens
+4. Overall health assessment of the meal
+Present the information in a concise, easy-to-read format using markdown and include emoji.
+"protein_grams", "carbs_grams", "fat_grams": the protein, carbs and fat of the dish in grams, matching the report. Approximate number is fine.
+If "single_dish" is false, use an empty "report" and 0 for the numbers.
+"""
+
 chart_data_prompt = """
 Return the macronutrient list from your previous answer, you should provide a list of data of macronutrients in the following format. you just need to provide the list, no need to make any explanation. Return the form of 'x, y, z', where x is the protein in x grams, y is the carbs in y grams, and z is the fat in z grams in number. i.e. 2.2, 3.3, 4.4. Approximate number is fine."""
 
@@ -74,4 +96,37 @@ You must provide review citation and must apply ' :green-background[place holder
 if it is too long. You are not allowed to provide citation without this format. If you can't a relavent review, do not mention citation.
 Logical assumption based on the review that didn't explicitly mentioned in the review can be made.
 If the review is a mixture of possitive and negative, you are allowed to split it as two review parts.
-'''
\ No newline at end of file
+'''
+restaurant_analysis = """
+Answer with a JSON object containing the keys "reason", "meal", "meal_citation" and "meal_description".
+
+"reason": provide reasons and a short explaination why this restaurant might be suitable for this situation.
+Please be confident on the reviews given, do not question them, treat them as facts.
+Do not ask for more information, just use what you have and the rest depends on your imagination.
+Include bad reviews too that might be disturbing in this scenario.
+Use food emoji in your sentence. Always relate your response to the scenario given. 
+You may give example for your explaination
+Write it in plane text, use food emoji. Bold important information not title.
+You must provide review citation and must apply ' :green-background[place holder] ' if it is a positive review
+, :red-background[place holder] ' if it a nagative review based on the requirement (not how does it sound) to your
+citation (the exact context of the review not the author) in a new line.
+Please trim the citation with '...' if it is too long. If you can't a relavent review, do not mention citation or claim. 
+Always include positive review if there is one. Do not sound too negative towards the restaurant.
+If the review is a mixture of possitive and negative, you are allowed to split it as two review parts.
+
+"meal": one meal that is suitable for the scenario strictly mentioned in the review, only the food name.
+"meal_citation": the review citation for the meal (the context not the author).
+"meal_description": food description that strongly focus on the taste and also include some explaination on why it is suitable.
+Include the dish name in your description.
+If you can't suggest a meal, use "None" for "meal", "meal_citation" and "meal_description".
+"""
+
+meal_analysis = """
+Answer with a JSON object containing the keys "meal", "meal_citation" and "meal_description".
+
+"meal": one meal that is suitable for the scenario strictly mentioned in the review, only the food name.
+"meal_citation": the review citation for the meal (the context not the author).
+"meal_description": food description that strongly focus on the taste and also include some explaination on why it is suitable.
+Include the dish name in your description.
+If you can't suggest a meal, use "None" for "meal", "meal_citation" and "meal_description".
+"""
@@ -2,14 +2,33 @@ import streamlit as st
 import os
 import google.generativeai as genai
 import math
+import json
+import random
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 from utils.utils import preprocess_restaurant_name
-from utils.data_structures import Input, Restaurant, RestaurantResult
-from utils.prompt import search_prompt, review_summary, meal_suggestion, column_prompt
-from utils.llm_api import get_Gemini
-from utils.google_map_api import gmaps_text_search, get_review_and_photo
+from utils.data_structures import Input, Restaurant, RestaurantResult, RestaurantAnalysis, MealAnalysis
+from utils.prompt import search_prompt, review_summary, meal_suggestion, column_prompt, restaurant_analysis, meal_analysis
+from utils.constants import COMBINED_RESTAURANT_ANALYSIS, STREAM_RESTAURANT_OUTPUT, LLM_MAX_WORKERS, STREAM_REFRESH_INTERVAL, RESTAURANT_SELECTION_LIMIT, RESTAURANT_SELECTION_STRATEGY, RESTAURANT_SELECTION_SEED, PIPELINE_BACKEND, SEARCH_TIMEOUT
+from utils.llm_api import generate_content, generate_content_stream, generate_content_async, generate_content_stream_async
+from utils.google_map_api import gmaps_text_search, fetch_reviews_and_photo_references, review_and_photo_reference
+from utils import async_api
 
-def add_column(input: Input, restaurant: Restaurant, prompt: str, column_name: str) -> Restaurant:
+# Gemini generation config constraining the response to the RestaurantAnalysis schema
+RESTAURANT_ANALYSIS_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": RestaurantAnalysis
+}
+
+# Gemini generation config constraining the response to the MealAnalysis schema
+MEAL_ANALYSIS_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": MealAnalysis
+}
+
+def add_column(input: Input, restaurant: Restaurant, prompt: str, column_name: str, use_cache: bool = True) -> Restaurant:
     """
     Add a additional custom analysis column to a restaurant using AI-generated content.
     
@@ -18,38 +37,46 @@ def add_column(input: Input, restaurant: Restaurant, prompt: str, column_name: s
         restaurant (Restaurant): Restaurant object to analyze
         prompt (str): Custom analysis question or instruction
         column_name (str): Name for the new analysis column
+        use_cache (bool, optional): Reuse the answer of an identical earlier request. Defaults to True.
         
     Returns:
         Restaurant: Updated restaurant object with new custom field
     """
-    model = get_Gemini()
-
-    response = model.generate_content(f"knowing that {input.get_remarks()}, the review {restaurant.get_review()}, tell me about: {prompt}" + column_prompt)
-    restaurant.add_custom_field(column_name, response.text)
+    text = f"knowing that {input.get_remarks()}, the review {restaurant.get_review()}, tell me about: {prompt}" + column_prompt
+    response = generate_content(text, stage="add_column", use_cache=use_cache)
+    restaurant.add_custom_field(column_name, response)
     return restaurant
 
 
-def process_restaurant(input: Input) -> RestaurantResult:
+def process_restaurant(input: Input, live_container=None) -> RestaurantResult:
     """
     Main restaurant processing pipeline using AI and Google Maps API.
     
     Args:
         input (Input): User input object with search criteria
+        live_container (optional): Streamlit st.empty() placeholder in which restaurant
+            cards are streamed while they are generated, cleared when the search ends
         
     Returns:
         RestaurantResult: Processed restaurant results with AI analysis, or None on error
         
     WARNING: This function triggers multiple Google Maps API calls:
-    - 1 text search, 5 place details, 5 photo requests, 1 geocode
+    - 1 text search, 5 place details, 1 geocode
+    - photo URLs are resolved later, when display_restaurant shows the cards
     - May incur significant costs based on Google Maps API pricing
     
     Complete processing pipeline:
     1. Generate AI-optimized search prompt from user input
     2. Perform Google Maps text search with filters
-    3. Select most relevant restaurants (max 5) using AI
-    4. Gather reviews and photos for each restaurant
-    5. Generate AI-powered restaurant recommendations
-    6. Create AI-suggested meals for each restaurant
+    3. Select restaurants (max 5) locally with the configured selection strategy
+    4. Gather reviews and photo references for all restaurants concurrently
+    5. Generate AI-powered restaurant recommendations and AI-suggested meals,
+       streamed into live_container when STREAM_RESTAURANT_OUTPUT is set, otherwise
+       in one structured call per restaurant when COMBINED_RESTAURANT_ANALYSIS is set
+    
+    With PIPELINE_BACKEND "async", steps 4 and 5 run as one independent chain
+    per restaurant on an event loop (run_async_pipeline), otherwise stage by
+    stage on thread pools (run_threaded_pipeline).
     
     Includes progress tracking, error handling, and user status updates.
     """
@@ -58,90 +85,575 @@ def process_restaurant(input: Input) -> RestaurantResult:
         try:
         
 
-            # Understand user needs and generate prompt for text search
-            text_search_prompt = get_search_prompt(input)
-            st.write(f"Searching Prompt: \n\n**{text_search_prompt}**")
-        
-            # Perform text search
-            filtered_result = gmaps_text_search(text_search_prompt, input)
-            st.write('---')
-            st.write(f"Got **{len(filtered_result)}** results")
+            if PIPELINE_BACKEND == "async":
+                selected_result = run_async_pipeline(input, live_container)
+            else:
+                selected_result = run_threaded_pipeline(input, live_container)
+    
+            status.update(label="Search Complete!", state="complete", expanded=False)
         
-            # Tidy up output and generate random (max five) restaurant
-            selected_result: RestaurantResult = restaurant_parser(filtered_result)
-            st.write(f"---")
-            st.write(f"Selected **{len(selected_result)}** most relevant results")
+            return selected_result
             
-            # Gather review and photo
-            updated_list = []
-            for each_restaurant in selected_result.get_list():
-                each_id = each_restaurant.get_place_id()
-                review, photo_url = get_review_and_photo(each_id)
-                each_restaurant.add_reviews(review)
-                each_restaurant.set_photo(photo_url)
-                
-                updated_list.append(each_restaurant)
+        except Exception as e:
+            st.error("Server busy, please try again later 🙁 \n(please wait approximately one minute before trying again)")
+            # st.write(e)
+            return None
 
-            st.write(f"---")
-            st.write(f"Gathered reviews and photos")
+        finally:
+            if live_container is not None:
+                live_container.empty()
+
+
+def run_threaded_pipeline(input: Input, live_container=None) -> RestaurantResult:
+    """
+    Run the search pipeline with blocking calls and thread pools, reporting progress in the current status.
+    
+    Args:
+        input (Input): User input object with search criteria
+        live_container (optional): st.empty() placeholder for the streamed restaurant cards
         
+    Returns:
+        RestaurantResult: Processed restaurant results with AI analysis
+    """
+    # Understand user needs and generate prompt for text search
+    text_search_prompt = get_search_prompt(input)
+    st.write(f"Searching Prompt: \n\n**{text_search_prompt}**")
+
+    # Perform text search
+    filtered_result = gmaps_text_search(text_search_prompt, input)
+    st.write('---')
+    st.write(f"Got **{len(filtered_result)}** results")
+
+    # Tidy up output and select (max five) restaurant
+    selected_result: RestaurantResult = restaurant_parser(filtered_result)
+    st.write(f"---")
+    st.write(f"Selected **{len(selected_result)}** most relevant results")
+
+    # Gather review and photo reference concurrently, dropping restaurants whose lookup failed
+    place_ids = [each_restaurant.get_place_id() for each_restaurant in selected_result.get_list()]
+    details = fetch_reviews_and_photo_references(place_ids)
+
+    updated_list = []
+    for each_restaurant, each_details in zip(selected_result.get_list(), details):
+        if each_details is None:
+            continue
+        review, photo_reference = each_details
+        each_restaurant.add_reviews(review)
+        each_restaurant.set_photo_reference(photo_reference)
+
+        updated_list.append(each_restaurant)
+
+    st.write(f"---")
+    st.write(f"Gathered reviews and photos")
+    if len(updated_list) < len(place_ids):
+        st.write(f"Skipped **{len(place_ids) - len(updated_list)}** restaurant(s) with unavailable details")
+
+
+    # Update restaurant list
+    selected_result.update_list(updated_list)
+
+    if STREAM_RESTAURANT_OUTPUT and live_container is not None:
+        stream_restaurant_output(selected_result, input, live_container)
+    elif COMBINED_RESTAURANT_ANALYSIS:
+        generate_restaurant_analysis(selected_result, input)
+    else:
+        generate_restaurant_output(selected_result, input)
+
+    return selected_result
+
+
+class SearchProgress:
+    """
+    Progress of a search running on the event loop, read by the script thread to update the page.
+    
+    Attributes are only ever set by the pipeline coroutines, each once it is
+    final, so the script thread can poll them without locking.
+    """
+
+    def __init__(self, stream: bool):
+        """
+        Initialize an empty progress record.
         
-            # Update restaurant list
-            selected_result.update_list(updated_list)
-            progress_counter = 0
+        Args:
+            stream (bool): Whether reasons are streamed into reason_chunks
+        """
+        self.stream: bool = stream
+        self.text_search_prompt: str = None
+        self.result_count: int = None
+        self.restaurants: list[Restaurant] = None
+        self.reason_chunks: list[list[str]] = []
+        self.reasons_done: list[bool] = []
+        self.outcomes: list[bool] = []
+
 
+def run_async_pipeline(input: Input, live_container=None) -> RestaurantResult:
+    """
+    Run the search pipeline on the shared event loop, reporting progress in the current status.
+    
+    Args:
+        input (Input): User input object with search criteria
+        live_container (optional): st.empty() placeholder for the streamed restaurant cards
+        
+    Returns:
+        RestaurantResult: Processed restaurant results with AI analysis
+        
+    Raises:
+        TimeoutError: If the search takes longer than SEARCH_TIMEOUT seconds
+        
+    Sync facade of search_restaurants_async: the coroutine runs on the loop of
+    utils.async_api while the script thread polls its SearchProgress, since
+    Streamlit elements can only be updated from the script thread. The
+    coroutine is cancelled whenever the script thread leaves early, e.g. when
+    the user stops or reruns the script.
+    """
+    progress = SearchProgress(stream=STREAM_RESTAURANT_OUTPUT and live_container is not None)
+    future = async_api.submit(search_restaurants_async(input, progress))
+    try:
+        return _poll_async_pipeline(future, progress, live_container)
+    finally:
+        # No-op if the search finished
+        future.cancel()
+
+
+def _poll_async_pipeline(future, progress: SearchProgress, live_container) -> RestaurantResult:
+    """
+    Show the progress of a running search until it finishes.
+    
+    Args:
+        future (concurrent.futures.Future): Future of search_restaurants_async
+        progress (SearchProgress): Progress record of the search
+        live_container (optional): st.empty() placeholder for the streamed restaurant cards
+        
+    Returns:
+        RestaurantResult: Result of the search
+        
+    Raises:
+        TimeoutError: If the search takes longer than SEARCH_TIMEOUT seconds
+    """
+    deadline = time.monotonic() + SEARCH_TIMEOUT
+    progress_text = "Generating restaurant and meal output..."
+    shown_prompt = shown_count = False
+    res_bar = None
+    placeholders = []
+    shown_states = []
+    while True:
+        done = future.done()
+
+        if not shown_prompt and progress.text_search_prompt is not None:
+            shown_prompt = True
+            st.write(f"Searching Prompt: \n\n**{progress.text_search_prompt}**")
+
+        if not shown_count and progress.result_count is not None:
+            shown_count = True
+            st.write('---')
+            st.write(f"Got **{progress.result_count}** results")
+            if progress.result_count == 0:
+                st.toast('search map error')
+
+        if res_bar is None and progress.restaurants is not None:
+            st.write(f"---")
+            st.write(f"Selected **{len(progress.restaurants)}** most relevant results")
             st.write(f"---")
-            progress_text = "Generating restaurant output..."
             res_bar = st.progress(0.0, text=progress_text)
-            total_restaurants_no = len(selected_result.get_list())
-            
-            # generate summary
-            updated_list = []
-            for index, each_restaurant in enumerate(selected_result.get_list()):
-                reason = get_review_summary(each_restaurant, input)
-                each_restaurant.add_restaurant_reason(reason)
-                updated_list.append(each_restaurant)
-                progress = min((index + 1) / total_restaurants_no, 1.0)
-                res_bar.progress(progress, text=progress_text)
-        
-            # Update restaurant list
-            selected_result.update_list(updated_list)
+            if progress.stream and progress.restaurants:
+                placeholders = _show_preview_cards(progress.restaurants, live_container)
+                shown_states = [None] * len(progress.restaurants)
 
-            st.write(f"---")
-            progress_text = "Generating meal output..."
-            meal_bar = st.progress(0.0, text=progress_text)
-            total_restaurants_no = len(selected_result.get_list())
+        if res_bar is not None:
+            _update_preview_cards(placeholders, progress.reason_chunks, progress.reasons_done, shown_states)
+            finished = sum(outcome is not None for outcome in progress.outcomes)
+            res_bar.progress(finished / max(len(progress.outcomes), 1), text=progress_text)
 
-            
-            # Generate meal suggestion
-            updated_list = []
+        if done:
+            break
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Search did not finish within {SEARCH_TIMEOUT} seconds")
+        time.sleep(STREAM_REFRESH_INTERVAL)
+
+    selected_result = future.result()
+
+    st.write(f"---")
+    st.write(f"Gathered reviews and photos")
+    skipped = progress.outcomes.count(False)
+    if skipped:
+        st.write(f"Skipped **{skipped}** restaurant(s) with unavailable details")
+
+    return selected_result
+
+
+async def search_restaurants_async(input: Input, progress: SearchProgress) -> RestaurantResult:
+    """
+    Coroutine version of the search pipeline, overlapping the work of all restaurants.
+    
+    Args:
+        input (Input): User input object with search criteria
+        progress (SearchProgress): Progress record updated as the stages finish
+        
+    Returns:
+        RestaurantResult: Restaurants whose details could be gathered, with reasons, meals and photo references
+        
+    After the search prompt and the text search, every selected restaurant
+    runs its own chain (details, then analysis), so the search takes about as
+    long as its slowest chain. Photos are resolved later, when
+    display_restaurant shows the cards, like in the threaded pipeline. If a chain
+    fails outside of the details lookup, the other chains are cancelled and
+    the error is raised.
+    
+    The search's non-streamed Gemini calls share LLM_MAX_WORKERS slots of its
+    own, so concurrent searches do not queue behind each other. Streamed
+    reasons, one per restaurant, do not take a slot, so they never hold up
+    the meal calls.
+    """
+    llm_slots = asyncio.Semaphore(LLM_MAX_WORKERS)
+    progress.text_search_prompt = await get_search_prompt_async(input, llm_slots)
+    filtered_result = await async_api.gmaps_text_search_async(progress.text_search_prompt, input)
+    progress.result_count = len(filtered_result)
+
+    selected_result: RestaurantResult = restaurant_parser(filtered_result)
+    restaurants = selected_result.get_list()
+    progress.reason_chunks = [[] for _ in restaurants]
+    progress.reasons_done = [False] * len(restaurants)
+    progress.outcomes = [None] * len(restaurants)
+    progress.restaurants = restaurants
+
+    tasks = [
+        asyncio.create_task(_analyse_restaurant_async(each_restaurant, input, progress, index, llm_slots))
+        for index, each_restaurant in enumerate(restaurants)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for each_task in tasks:
+            each_task.cancel()
+        raise
+
+    # Update restaurant list
+    selected_result.update_list([
+        each_restaurant for each_restaurant, outcome in zip(restaurants, progress.outcomes) if outcome
+    ])
+    return selected_result
+
+
+async def _analyse_restaurant_async(restaurant: Restaurant, input: Input, progress: SearchProgress, index: int, llm_slots: asyncio.Semaphore):
+    """
+    Gather the details of one restaurant, then generate its reason and meal.
+    
+    Args:
+        restaurant (Restaurant): Restaurant to complete in place
+        input (Input): User input object with preferences and criteria
+        progress (SearchProgress): Progress record of the search
+        index (int): Position of the restaurant in progress.restaurants
+        llm_slots (asyncio.Semaphore): Gemini request slots of the search
+    """
+    try:
+        details = await async_api.get_place_details_async(restaurant.get_place_id())
+        review, photo_reference = review_and_photo_reference(details)
+    except Exception:
+        # Restaurants with unavailable details are skipped, like in the threaded pipeline
+        progress.reason_chunks[index].append("_Details unavailable, skipped._")
+        progress.reasons_done[index] = True
+        progress.outcomes[index] = False
+        return
+
+    restaurant.add_reviews(review)
+    restaurant.set_photo_reference(photo_reference)
+
+    if progress.stream:
+        reason, (meal, meal_citation, meal_description) = await asyncio.gather(
+            _collect_review_summary_async(restaurant, input, progress, index),
+            get_restaurant_meal_async(restaurant, input, llm_slots)
+        )
+    elif COMBINED_RESTAURANT_ANALYSIS:
+        try:
+            analysis = await get_restaurant_analysis_async(restaurant, input, llm_slots)
+            reason = analysis["reason"]
+            meal, meal_citation, meal_description = analysis["meal"], analysis["meal_citation"], analysis["meal_description"]
+        except ValueError:
+            reason, (meal, meal_citation, meal_description) = await asyncio.gather(
+                get_review_summary_async(restaurant, input, llm_slots),
+                get_meal_suggestion_async(restaurant, input, llm_slots)
+            )
+    else:
+        reason, (meal, meal_citation, meal_description) = await asyncio.gather(
+            get_review_summary_async(restaurant, input, llm_slots),
+            get_meal_suggestion_async(restaurant, input, llm_slots)
+        )
+
+    restaurant.add_restaurant_reason(reason)
+    restaurant.add_meal(meal, meal_citation, meal_description)
+    progress.outcomes[index] = True
+
+
+async def _collect_review_summary_async(restaurant: Restaurant, input: Input, progress: SearchProgress, index: int) -> str:
+    """Coroutine version of _collect_review_summary, marking the reason as done in progress."""
+    chunks = progress.reason_chunks[index]
+    try:
+        async for text in generate_content_stream_async(_review_summary_prompt(restaurant, input), stage="review_summary"):
+            chunks.append(text)
+    finally:
+        progress.reasons_done[index] = True
+    return "".join(chunks)
+
+
+async def get_search_prompt_async(input: Input, llm_slots: asyncio.Semaphore, use_cache: bool = True) -> str:
+    """Coroutine version of get_search_prompt, holding one of the search's Gemini slots."""
+    async with llm_slots:
+        response = await generate_content_async(f"{search_prompt} \n\n{input.get_remarks()}", stage="search_prompt", use_cache=use_cache)
+    return _format_search_prompt(response, input)
+
+
+async def get_review_summary_async(restaurant: Restaurant, input: Input, llm_slots: asyncio.Semaphore, use_cache: bool = True) -> str:
+    """Coroutine version of get_review_summary, holding one of the search's Gemini slots."""
+    async with llm_slots:
+        return await generate_content_async(_review_summary_prompt(restaurant, input), stage="review_summary", use_cache=use_cache)
+
+
+async def get_meal_suggestion_async(restaurant: Restaurant, input: Input, llm_slots: asyncio.Semaphore, use_cache: bool = True):
+    """Coroutine version of get_meal_suggestion, holding one of the search's Gemini slots."""
+    async with llm_slots:
+        response = await generate_content_async(_meal_suggestion_prompt(restaurant, input), stage="meal_suggestion", use_cache=use_cache, validate=parse_meal_suggestion)
+    return parse_meal_suggestion(response)
 
-            for index, each_restaurant in enumerate(selected_result.get_list()):
-                meal, meal_citation, meal_description = get_meal_suggestion(each_restaurant, input)
-                each_restaurant.add_meal(meal, meal_citation, meal_description)
-                updated_list.append(each_restaurant)
-                progress = min((index + 1) / total_restaurants_no, 1.0)
-                meal_bar.progress(progress, text=progress_text)
+
+async def get_restaurant_analysis_async(restaurant: Restaurant, input: Input, llm_slots: asyncio.Semaphore, use_cache: bool = True) -> RestaurantAnalysis:
+    """Coroutine version of get_restaurant_analysis, holding one of the search's Gemini slots."""
+    async with llm_slots:
+        response = await generate_content_async(
+            _restaurant_analysis_prompt(restaurant, input),
+            stage="restaurant_analysis",
+            generation_config=RESTAURANT_ANALYSIS_CONFIG,
+            use_cache=use_cache,
+            validate=parse_restaurant_analysis
+        )
+    return parse_restaurant_analysis(response)
+
+
+async def get_meal_analysis_async(restaurant: Restaurant, input: Input, llm_slots: asyncio.Semaphore, use_cache: bool = True) -> MealAnalysis:
+    """Coroutine version of get_meal_analysis, holding one of the search's Gemini slots."""
+    async with llm_slots:
+        response = await generate_content_async(
+            _meal_analysis_prompt(restaurant, input),
+            stage="meal_analysis",
+            generation_config=MEAL_ANALYSIS_CONFIG,
+            use_cache=use_cache,
+            validate=parse_meal_analysis
+        )
+    return parse_meal_analysis(response)
+
+
+async def get_restaurant_meal_async(restaurant: Restaurant, input: Input, llm_slots: asyncio.Semaphore):
+    """Coroutine version of get_restaurant_meal."""
+    try:
+        analysis = await get_meal_analysis_async(restaurant, input, llm_slots)
+        return analysis["meal"], analysis["meal_citation"], analysis["meal_description"]
+    except ValueError:
+        return await get_meal_suggestion_async(restaurant, input, llm_slots)
+
+
+def generate_restaurant_analysis(selected_result: RestaurantResult, input: Input):
+    """
+    Fill in reasons and meals of all restaurants with one LLM call per restaurant.
+    
+    Args:
+        selected_result (RestaurantResult): Restaurants with reviews already gathered
+        input (Input): User input object with preferences and criteria
         
-            # Update restaurant list
-            selected_result.update_list(updated_list)
+    Uses get_restaurant_analysis for each restaurant and falls back to the
+    separate review summary and meal suggestion calls for a restaurant whose
+    structured response could not be validated.
+    """
+    st.write(f"---")
+    progress_text = "Generating restaurant and meal output..."
+    res_bar = st.progress(0.0, text=progress_text)
+    total_restaurants_no = len(selected_result.get_list())
+
+    updated_list = []
+    for index, each_restaurant in enumerate(selected_result.get_list()):
+        try:
+            analysis = get_restaurant_analysis(each_restaurant, input)
+            each_restaurant.add_restaurant_reason(analysis["reason"])
+            each_restaurant.add_meal(analysis["meal"], analysis["meal_citation"], analysis["meal_description"])
+        except ValueError:
+            each_restaurant.add_restaurant_reason(get_review_summary(each_restaurant, input))
+            meal, meal_citation, meal_description = get_meal_suggestion(each_restaurant, input)
+            each_restaurant.add_meal(meal, meal_citation, meal_description)
+
+        updated_list.append(each_restaurant)
+        progress = min((index + 1) / total_restaurants_no, 1.0)
+        res_bar.progress(progress, text=progress_text)
+
+    # Update restaurant list
+    selected_result.update_list(updated_list)
+
+
+def stream_restaurant_output(selected_result: RestaurantResult, input: Input, live_container):
+    """
+    Fill in reasons and meals of all restaurants while streaming the reasons into the page.
     
-            status.update(label="Search Complete!", state="complete", expanded=False)
+    Args:
+        selected_result (RestaurantResult): Restaurants with reviews already gathered
+        input (Input): User input object with preferences and criteria
+        live_container: Streamlit st.empty() placeholder for the preview cards
         
-            return selected_result
-            
-        except Exception as e:
-            st.error("Server busy, please try again later 🙁 \n(please wait approximately one minute before trying again)")
-            # st.write(e)
-            return None
+    Shows a card per restaurant straight away and fills its reason in as the
+    streamed Gemini response arrives. All reasons stream concurrently on a pool
+    of their own, while the meal of each restaurant is generated in the
+    background by get_restaurant_meal on a pool of LLM_MAX_WORKERS threads, so
+    meals never wait for the streams. Worker threads only collect text; the
+    cards are updated from the script thread.
+    """
+    restaurants = selected_result.get_list()
+    if not restaurants:
+        return
+
+    st.write(f"---")
+    progress_text = "Generating restaurant and meal output..."
+    res_bar = st.progress(0.0, text=progress_text)
+
+    placeholders = _show_preview_cards(restaurants, live_container)
+
+    reason_chunks = [[] for _ in restaurants]
+    with ThreadPoolExecutor(max_workers=len(restaurants)) as reason_executor, \
+            ThreadPoolExecutor(max_workers=min(LLM_MAX_WORKERS, len(restaurants))) as meal_executor:
+        reason_futures = [
+            reason_executor.submit(_collect_review_summary, each_restaurant, input, chunks)
+            for each_restaurant, chunks in zip(restaurants, reason_chunks)
+        ]
+        meal_futures = [meal_executor.submit(get_restaurant_meal, each_restaurant, input) for each_restaurant in restaurants]
+
+        shown_states = [None] * len(restaurants)
+        while True:
+            reasons_done = [future.done() for future in reason_futures]
+            all_done = all(reasons_done)
+            _update_preview_cards(placeholders, reason_chunks, reasons_done, shown_states)
+
+            finished = sum(reasons_done)
+            res_bar.progress(finished / len(restaurants), text=progress_text)
+            if all_done:
+                break
+            time.sleep(STREAM_REFRESH_INTERVAL)
+
+        for each_restaurant, reason_future, meal_future in zip(restaurants, reason_futures, meal_futures):
+            each_restaurant.add_restaurant_reason(reason_future.result())
+            meal, meal_citation, meal_description = meal_future.result()
+            each_restaurant.add_meal(meal, meal_citation, meal_description)
+
+    # Update restaurant list
+    selected_result.update_list(restaurants)
+
+
+def _show_preview_cards(restaurants: list[Restaurant], live_container) -> list:
+    """
+    Show an empty preview card per restaurant.
+    
+    Args:
+        restaurants (list[Restaurant]): Restaurants being analysed
+        live_container: Streamlit st.empty() placeholder for the preview cards
+        
+    Returns:
+        list: One st.empty() placeholder per restaurant for its streamed reason
+    """
+    placeholders = []
+    with live_container.container():
+        st.markdown("## AI-Suggested Restaurants")
+        for each_restaurant in restaurants:
+            with st.container(border=True):
+                st.markdown(f"### {each_restaurant.get_name()}")
+                st.caption(f"⭐ {each_restaurant.get_rating()} · {each_restaurant.get_address()}")
+                placeholders.append(st.empty())
+    return placeholders
+
+
+def _update_preview_cards(placeholders: list, reason_chunks: list, reasons_done: list, shown_states: list):
+    """
+    Redraw the preview cards whose streamed reason changed since the last call.
+    
+    Args:
+        placeholders (list): Placeholders returned by _show_preview_cards
+        reason_chunks (list): Per restaurant, the list of reason pieces received so far
+        reasons_done (list): Per restaurant, whether its reason is complete
+        shown_states (list): Per restaurant, the state last drawn, updated in place
+    """
+    for index, placeholder in enumerate(placeholders):
+        state = (len(reason_chunks[index]), reasons_done[index])
+        if state != shown_states[index]:
+            shown_states[index] = state
+            cursor = "" if state[1] else " ▌"
+            placeholder.markdown("".join(reason_chunks[index][:state[0]]) + cursor)
+
+
+def _collect_review_summary(restaurant: Restaurant, input: Input, chunks: list) -> str:
+    """
+    Stream a restaurant's reason into a shared list of chunks.
+    
+    Args:
+        restaurant (Restaurant): Restaurant object with review data
+        input (Input): User input object with preferences and criteria
+        chunks (list): List the streamed text pieces are appended to
+        
+    Returns:
+        str: The complete reason
+    """
+    for text in get_review_summary_stream(restaurant, input):
+        chunks.append(text)
+    return "".join(chunks)
+
+
+def generate_restaurant_output(selected_result: RestaurantResult, input: Input):
+    """
+    Fill in reasons and meals of all restaurants with two LLM calls per restaurant.
+    
+    Args:
+        selected_result (RestaurantResult): Restaurants with reviews already gathered
+        input (Input): User input object with preferences and criteria
+        
+    Generates every restaurant's recommendation reason first, then every
+    restaurant's meal suggestion, with a progress bar for each stage.
+    """
+    st.write(f"---")
+    progress_text = "Generating restaurant output..."
+    res_bar = st.progress(0.0, text=progress_text)
+    total_restaurants_no = len(selected_result.get_list())
+    
+    # generate summary
+    updated_list = []
+    for index, each_restaurant in enumerate(selected_result.get_list()):
+        reason = get_review_summary(each_restaurant, input)
+        each_restaurant.add_restaurant_reason(reason)
+        updated_list.append(each_restaurant)
+        progress = min((index + 1) / total_restaurants_no, 1.0)
+        res_bar.progress(progress, text=progress_text)
+
+    # Update restaurant list
+    selected_result.update_list(updated_list)
+
+    st.write(f"---")
+    progress_text = "Generating meal output..."
+    meal_bar = st.progress(0.0, text=progress_text)
+    total_restaurants_no = len(selected_result.get_list())
+
+    
+    # Generate meal suggestion
+    updated_list = []
+
+    for index, each_restaurant in enumerate(selected_result.get_list()):
+        meal, meal_citation, meal_description = get_meal_suggestion(each_restaurant, input)
+        each_restaurant.add_meal(meal, meal_citation, meal_description)
+        updated_list.append(each_restaurant)
+        progress = min((index + 1) / total_restaurants_no, 1.0)
+        meal_bar.progress(progress, text=progress_text)
+
+    # Update restaurant list
+    selected_result.update_list(updated_list)
 
 
-def get_search_prompt(input: Input) -> str:
+def get_search_prompt(input: Input, use_cache: bool = True) -> str:
     """
     Generate an optimized search prompt for Google Maps API using AI.
     
     Args:
         input (Input): User input object containing search preferences
+        use_cache (bool, optional): Reuse the answer of an identical earlier request. Defaults to True.
         
     Returns:
         str: AI-optimized search query formatted for Google Maps text search
@@ -150,71 +662,116 @@ def get_search_prompt(input: Input) -> str:
     into an effective search query, then combines with cuisine, craving,
     and location information to create the final search prompt.
     """
-    model = get_Gemini()
-    
-    response = model.generate_content(f"{search_prompt} \n\n{input.get_remarks()}")
-    text_search_prompt = f"$$ {response.text[:-2]} {input.get_cuisine()} {input.get_craving()} {input.get_city()}"
+    response = generate_content(f"{search_prompt} \n\n{input.get_remarks()}", stage="search_prompt", use_cache=use_cache)
+    return _format_search_prompt(response, input)
+
+def _format_search_prompt(response: str, input: Input) -> str:
+    """Combine the AI search query with the cuisine, craving and city of the input."""
+    text_search_prompt = f"$$ {response[:-2]} {input.get_cuisine()} {input.get_craving()} {input.get_city()}"
     return text_search_prompt
     
-def generate_random_index(filtered_results) -> list[int]:
+def select_restaurant_index(filtered_results, limit: int = RESTAURANT_SELECTION_LIMIT, strategy: str = RESTAURANT_SELECTION_STRATEGY, seed: int = RESTAURANT_SELECTION_SEED) -> list[int]:
     """
-    Generate random non-duplicating indices.
+    Choose which of the text search results to analyse, without any AI call.
     
     Args:
         filtered_results: List of restaurant results from Google Maps API
+        limit (int, optional): Maximum number of indices to return. Defaults to RESTAURANT_SELECTION_LIMIT.
+        strategy (str, optional): Selection strategy. Defaults to RESTAURANT_SELECTION_STRATEGY.
+            - "random": uniform sample without duplicates
+            - "top_rating": highest rated first, ties broken by review count
+            - "top_reviews": most reviewed first
+            - "diverse": one pick per rating band, avoiding repeated restaurant names (chains)
+        seed (int, optional): Seed for the random strategies, None for a fresh sample
         
     Returns:
-        list[int]: List of random indices (max 5) for restaurant selection
+        list[int]: Non-duplicating indices into filtered_results (max limit)
+        
+    Raises:
+        ValueError: If the strategy is unknown
     """
-    model = get_Gemini()
-    no_to_generate = 0
+    no_to_generate = min(limit, len(filtered_results))
+    rng = random.Random(seed)
 
-    if len(filtered_results) >= 5:
-      no_to_generate = 5
-    else:
-      no_to_generate = len(filtered_results) - 1
+    if strategy == "random":
+        return rng.sample(range(len(filtered_results)), no_to_generate)
 
-    text = f'''
-            Please generate random non-duplicating {no_to_generate} index seperating with comma ', ' strictly in
-            the range 0 to {len(filtered_results) - 1}. Do not exceed the range.
-            Please do not code, provide only {no_to_generate} whole numbers. Do not respond my prompt, reply with numbers only
-            '''
+    if strategy == "top_rating":
+        ranked = sorted(
+            range(len(filtered_results)),
+            key=lambda i: (filtered_results[i].get('rating', 0), filtered_results[i].get('user_ratings_total', 0)),
+            reverse=True
+        )
+        return ranked[:no_to_generate]
 
-    response = model.generate_content(text)
-    random_index = list(map(int,response.text[:-2].split(', ')))
-    
-    return random_index
+    if strategy == "top_reviews":
+        ranked = sorted(
+            range(len(filtered_results)),
+            key=lambda i: filtered_results[i].get('user_ratings_total', 0),
+            reverse=True
+        )
+        return ranked[:no_to_generate]
+
+    if strategy == "diverse":
+        if no_to_generate == 0:
+            return []
+
+        # Split the results into rating bands and draw one restaurant from each band
+        ranked = sorted(range(len(filtered_results)), key=lambda i: filtered_results[i].get('rating', 0), reverse=True)
+        band_size = len(ranked) / no_to_generate
+        bands = [ranked[round(band * band_size):round((band + 1) * band_size)] for band in range(no_to_generate)]
 
+        selected = []
+        seen_names = set()
+        for band in bands:
+            rng.shuffle(band)
+            for each_index in band:
+                name = preprocess_restaurant_name(filtered_results[each_index].get('name', '')).lower()
+                if name not in seen_names:
+                    seen_names.add(name)
+                    selected.append(each_index)
+                    break
 
-def restaurant_parser(filtered_results) -> RestaurantResult:
+        # Top up with repeated names if there were not enough distinct ones
+        remaining = [i for i in ranked if i not in selected]
+        rng.shuffle(remaining)
+        return selected + remaining[:no_to_generate - len(selected)]
+
+    raise ValueError(f"Unknown restaurant selection strategy: {strategy}")
+
+
+def restaurant_parser(filtered_results, strategy: str = RESTAURANT_SELECTION_STRATEGY, seed: int = RESTAURANT_SELECTION_SEED) -> RestaurantResult:
     """
     Parse Google Maps API results into RestaurantResult objects.
     
     Args:
         filtered_results: Raw restaurant data from Google Maps API
+        strategy (str, optional): Selection strategy passed to select_restaurant_index
+        seed (int, optional): Seed for the random selection strategies
         
     Returns:
         RestaurantResult: Structured result object containing selected restaurants
         
     Creates a RestaurantResult object using filtered Google Maps data
-    and AI-generated random indices for restaurant selection.
+    and locally selected indices for restaurant selection.
     """
     
     restaurant_result = RestaurantResult(
         filtered_results,
-        random_index=generate_random_index(filtered_results)
+        random_index=select_restaurant_index(filtered_results, strategy=strategy, seed=seed)
     )
 
     return restaurant_result
     
 
-def get_review_summary(restaurant: Restaurant, input: Input) -> str:
+def get_review_summary(restaurant: Restaurant, input: Input, use_cache: bool = True) -> str:
     """
     Generate AI-powered restaurant recommendation reasoning from reviews.
     
     Args:
         restaurant (Restaurant): Restaurant object with review data
         input (Input): User input object with preferences and criteria
+        use_cache (bool, optional): Reuse the answer of an identical earlier request. Defaults to True.
         
     Returns:
         str: AI-generated explanation of why this restaurant is recommended
@@ -223,27 +780,43 @@ def get_review_summary(restaurant: Restaurant, input: Input) -> str:
     personalized recommendation reasoning based on user preferences.
     Strictly references only the provided review data for accuracy.
     """
-  model = get_Gemini()
-  review = restaurant.get_review()
-  name = restaurant.get_name()
+    return generate_content(_review_summary_prompt(restaurant, input), stage="review_summary", use_cache=use_cache)
 
-  text = f'''
-          Strictly and only refer to this: \n\n {review} \n\n
-          for this restaurant: {name} \n\n
-          ''' + review_summary + f''' \n\n
-          {str(input)}
-          '''
+def get_review_summary_stream(restaurant: Restaurant, input: Input, use_cache: bool = True):
+    """
+    Stream the AI-powered restaurant recommendation reasoning as it is generated.
+    
+    Args:
+        restaurant (Restaurant): Restaurant object with review data
+        input (Input): User input object with preferences and criteria
+        use_cache (bool, optional): Reuse the answer of an identical earlier request. Defaults to True.
+        
+    Yields:
+        str: Successive pieces of the text get_review_summary would return
+    """
+    yield from generate_content_stream(_review_summary_prompt(restaurant, input), stage="review_summary", use_cache=use_cache)
 
-  response = model.generate_content(text)
-  return response.text
+def _review_summary_prompt(restaurant: Restaurant, input: Input) -> str:
+    """Build the review summary prompt of a restaurant."""
+    review = restaurant.get_review()
+    name = restaurant.get_name()
+
+    text = f'''
+            Strictly and only refer to this: \n\n {review} \n\n
+            for this restaurant: {name} \n\n
+            ''' + review_summary + f''' \n\n
+            {str(input)}
+            '''
+    return text
 
-def get_meal_suggestion(restaurant: Restaurant, input: Input):
+def get_meal_suggestion(restaurant: Restaurant, input: Input, use_cache: bool = True):
     """
     Generate AI-suggested meal recommendations for a specific restaurant.
     
     Args:
         restaurant (Restaurant): Restaurant object with review data
         input (Input): User input object with preferences and dietary requirements
+        use_cache (bool, optional): Reuse the answer of an identical earlier request. Defaults to True.
         
     Returns:
         tuple: (meal, meal_citation, meal_description) where:
@@ -255,7 +828,11 @@ def get_meal_suggestion(restaurant: Restaurant, input: Input):
     specific meals that match user preferences. Returns structured data
     with meal name, citation, and description separated by '| ' delimiter.
     """
-    model = get_Gemini()
+    response = generate_content(_meal_suggestion_prompt(restaurant, input), stage="meal_suggestion", use_cache=use_cache, validate=parse_meal_suggestion)
+    return parse_meal_suggestion(response)
+
+def _meal_suggestion_prompt(restaurant: Restaurant, input: Input) -> str:
+    """Build the meal suggestion prompt of a restaurant."""
     review = restaurant.get_review()
     name = restaurant.get_name()
     
@@ -265,12 +842,195 @@ def get_meal_suggestion(restaurant: Restaurant, input: Input):
           {meal_suggestion} \n\n
           {str(input)}
           '''
+    return text
+
+def parse_meal_suggestion(response: str):
+    """
+    Split a meal suggestion response into its parts.
     
-    response = model.generate_content(text)
-    response = response.text.split('| ')
+    Args:
+        response (str): Model output with the parts separated by '| '
+        
+    Returns:
+        tuple: (meal, meal_citation, meal_description), see get_meal_suggestion
+        
+    Raises:
+        ValueError: If the response has fewer than three parts
+    """
+    response = response.split('| ')
+    if len(response) < 3:
+        raise ValueError("Meal suggestion response is missing the '| ' separated parts")
     meal = response[0]
     meal_citation = response[1]
     meal_description = response[2]
 
     return meal, meal_citation, meal_description
 
+
+def get_restaurant_analysis(restaurant: Restaurant, input: Input, use_cache: bool = True) -> RestaurantAnalysis:
+    """
+    Generate the recommendation reasoning and meal suggestion in one AI call.
+    
+    Args:
+        restaurant (Restaurant): Restaurant object with review data
+        input (Input): User input object with preferences and dietary requirements
+        use_cache (bool, optional): Reuse the answer of an identical earlier request. Defaults to True.
+        
+    Returns:
+        RestaurantAnalysis: Dictionary with 'reason', 'meal', 'meal_citation'
+            and 'meal_description' strings
+            
+    Raises:
+        ValueError: If the response does not match the RestaurantAnalysis schema
+        
+    Sends the reviews and the user requirements to Gemini once and asks for a
+    JSON response constrained to the RestaurantAnalysis schema, replacing the
+    separate get_review_summary and get_meal_suggestion calls.
+    """
+    response = generate_content(
+        _restaurant_analysis_prompt(restaurant, input),
+        stage="restaurant_analysis",
+        generation_config=RESTAURANT_ANALYSIS_CONFIG,
+        use_cache=use_cache,
+        validate=parse_restaurant_analysis
+    )
+    return parse_restaurant_analysis(response)
+
+
+def _restaurant_analysis_prompt(restaurant: Restaurant, input: Input) -> str:
+    """Build the combined restaurant analysis prompt of a restaurant."""
+    review = restaurant.get_review()
+    name = restaurant.get_name()
+
+    text = f'''
+          Strictly and only refer to this: \n\n {review} \n\n
+          for this restaurant: {name} \n\n
+          {restaurant_analysis} \n\n
+          {str(input)}
+          '''
+    return text
+
+
+def parse_restaurant_analysis(text: str) -> RestaurantAnalysis:
+    """
+    Validate a combined restaurant analysis response against its schema.
+    
+    Args:
+        text (str): Raw JSON text returned by the model
+        
+    Returns:
+        RestaurantAnalysis: Parsed analysis with every field present as a string
+        
+    Raises:
+        ValueError: If the text is not a JSON object with all required string fields
+    """
+    return _parse_json_fields(text, RestaurantAnalysis, "Restaurant analysis")
+
+
+def _parse_json_fields(text: str, schema, label: str) -> dict:
+    """
+    Parse a JSON response whose fields are all strings.
+    
+    Args:
+        text (str): Raw JSON text returned by the model
+        schema: TypedDict listing the required fields
+        label (str): Name of the response in error messages
+        
+    Returns:
+        dict: The required fields, stripped
+        
+    Raises:
+        ValueError: If the text is not a JSON object with all required string fields
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid {label.lower()} response: {e}") from e
+
+    if not isinstance(data, dict):
+        raise ValueError(f"{label} response is not a JSON object")
+
+    analysis = {}
+    for field in schema.__annotations__:
+        value = data.get(field)
+        if not isinstance(value, str):
+            raise ValueError(f"{label} response is missing '{field}'")
+        analysis[field] = value.strip()
+
+    return analysis
+
+
+def get_meal_analysis(restaurant: Restaurant, input: Input, use_cache: bool = True) -> MealAnalysis:
+    """
+    Generate only the meal suggestion of a restaurant as structured output.
+    
+    Args:
+        restaurant (Restaurant): Restaurant object with review data
+        input (Input): User input object with preferences and dietary requirements
+        use_cache (bool, optional): Reuse the answer of an identical earlier request. Defaults to True.
+        
+    Returns:
+        MealAnalysis: Dictionary with 'meal', 'meal_citation' and 'meal_description' strings
+        
+    Raises:
+        ValueError: If the response does not match the MealAnalysis schema
+        
+    Used when the reason is streamed by its own call, so the model does not
+    write a second reason that would be thrown away.
+    """
+    response = generate_content(
+        _meal_analysis_prompt(restaurant, input),
+        stage="meal_analysis",
+        generation_config=MEAL_ANALYSIS_CONFIG,
+        use_cache=use_cache,
+        validate=parse_meal_analysis
+    )
+    return parse_meal_analysis(response)
+
+
+def _meal_analysis_prompt(restaurant: Restaurant, input: Input) -> str:
+    """Build the structured meal suggestion prompt of a restaurant."""
+    review = restaurant.get_review()
+    name = restaurant.get_name()
+
+    text = f'''
+          Strictly and only refer to this: \n\n {review} \n\n
+          for this restaurant: {name} \n\n
+          {meal_analysis} \n\n
+          {str(input)}
+          '''
+    return text
+
+
+def parse_meal_analysis(text: str) -> MealAnalysis:
+    """
+    Validate a structured meal suggestion response against its schema.
+    
+    Args:
+        text (str): Raw JSON text returned by the model
+        
+    Returns:
+        MealAnalysis: Parsed meal with every field present as a string
+        
+    Raises:
+        ValueError: If the text is not a JSON object with all required string fields
+    """
+    return _parse_json_fields(text, MealAnalysis, "Meal analysis")
+
+
+def get_restaurant_meal(restaurant: Restaurant, input: Input):
+    """
+    Generate the AI-suggested meal of a restaurant, preferring the structured meal-only call.
+    
+    Args:
+        restaurant (Restaurant): Restaurant object with review data
+        input (Input): User input object with preferences and dietary requirements
+        
+    Returns:
+        tuple: (meal, meal_citation, meal_description), see get_meal_suggestion
+    """
+    try:
+        analysis = get_meal_analysis(restaurant, input)
+        return analysis["meal"], analysis["meal_citation"], analysis["meal_description"]
+    except ValueError:
+        return get_meal_suggestion(restaurant, input)
@@ -0,0 +1,140 @@
+"""
+This file contains the user accounts of the users database and its schema migrations, free of any page code.
+"""
+
+import hashlib
+import threading
+
+from utils import db
+
+# Schema changes of the users database, applied in order; PRAGMA user_version
+# records how many of them a database file already has
+MIGRATIONS = [
+    ['''CREATE TABLE IF NOT EXISTS users
+        (username TEXT PRIMARY KEY, password TEXT, remarks TEXT)'''],
+    ['''CREATE TABLE IF NOT EXISTS chat_messages
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+         username TEXT NOT NULL REFERENCES users(username) ON DELETE CASCADE,
+         role TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL)''',
+     'CREATE INDEX IF NOT EXISTS chat_messages_user ON chat_messages (username, id)'],
+]
+
+_lock = threading.Lock()
+_migrated = False
+
+
+def migrate():
+    """
+    Bring the users database schema up to date, once per process.
+
+    Called at app startup; the first repository call runs it as well, so
+    importing this module never touches the database. Later calls return
+    immediately, so page reruns do no DDL.
+    """
+    global _migrated
+    if _migrated:
+        return
+    with _lock:
+        if _migrated:
+            return
+        with db.transaction() as conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for statements in MIGRATIONS[version:]:
+                for statement in statements:
+                    conn.execute(statement)
+            if version < len(MIGRATIONS):
+                conn.execute(f'PRAGMA user_version = {len(MIGRATIONS)}')
+        _migrated = True
+
+
+def make_hashes(password: str) -> str:
+    """
+    Hash a password for storage.
+
+    Args:
+        password (str): Plain text password
+
+    Returns:
+        str: SHA-256 hex digest of the password
+    """
+    return hashlib.sha256(str.encode(password)).hexdigest()
+
+
+def check_hashes(password: str, hashed_text: str) -> bool:
+    """
+    Check a password against its stored hash.
+
+    Args:
+        password (str): Plain text password
+        hashed_text (str): Stored hash, see make_hashes
+
+    Returns:
+        bool: True if the password matches
+    """
+    return make_hashes(password) == hashed_text
+
+
+def add_user(username: str, password: str, remarks: str):
+    """
+    Create a user account.
+
+    Args:
+        username (str): Unique username
+        password (str): Plain text password, stored hashed
+        remarks (str): The user's eating habits
+
+    Raises:
+        sqlite3.IntegrityError: If the username is already taken
+    """
+    migrate()
+    with db.transaction() as conn:
+        conn.execute('INSERT INTO users (username, password, remarks) VALUES (?,?,?)',
+                     (username, make_hashes(password), remarks))
+
+
+def update_user(username: str, password: str, remarks: str):
+    """
+    Update a user's password and remarks in one transaction.
+
+    Args:
+        username (str): Username of the account
+        password (str): New plain text password, stored hashed
+        remarks (str): New eating habits
+    """
+    migrate()
+    with db.transaction() as conn:
+        conn.execute('UPDATE users SET remarks = ?, password = ? WHERE username = ?',
+                     (remarks, make_hashes(password), username))
+
+
+def get_remarks(username: str) -> str:
+    """
+    Get a user's remarks.
+
+    Args:
+        username (str): Username of the account
+
+    Returns:
+        str: The stored remarks, or an empty string if the user does not exist
+    """
+    migrate()
+    data = db.query_one('SELECT remarks FROM users WHERE username =?', (username, ))
+    return data[0] if data else ""
+
+
+def login_user(username: str, password: str) -> bool:
+    """
+    Check a user's credentials.
+
+    Args:
+        username (str): Username of the account
+        password (str): Plain text password
+
+    Returns:
+        bool: True if the account exists and the password matches
+    """
+    migrate()
+    data = db.query_one('SELECT password FROM users WHERE username =?', (username, ))
+    if data:
+        return check_hashes(password, data[0])
+    return False
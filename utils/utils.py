@@ -1,68 +1,205 @@
 import streamlit as st
 import random
-from utils.constants import food_facts
-import os
+from utils.constants import food_facts, VISION_IMAGE_MAX_EDGE, VISION_IMAGE_FORMAT, VISION_IMAGE_QUALITY, VISION_PAYLOAD_CACHE_MAX_ENTRIES
 import re
 import io
 import base64
-from openai import OpenAI
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageOps
+from utils import llm_api
 
-# from langchain.memory import ConversationBufferMemory
-# from langchain.chains import ConversationChain
-# from langchain.chat_models import ChatOpenAI
 import google.generativeai as genai
 
-def get_OpenAI():
-  api_key = os.environ["OPENAI_SECRET_KEY"]
-  return ChatOpenAI(api_key = api_key, model="gpt-4o", temperature=1.0, max_tokens=100)
-
 # def get_gemini():
 #   api_key = os.environ["GEMINI_SECRET_KEY"]
 #   genai.configure(api_key=api_key)
 #   return genai.GenerativeModel('gemini-1.5-flash')
 
-def response_imageOpenAI(prompt, image):
-  api_key = os.environ["OPENAI_SECRET_KEY"]
-  client = OpenAI(api_key=api_key)
+IMAGE_ANALYSIS_FAILED = "I'm sorry, I couldn't analyze the image. Please try again."
+
+def response_imageOpenAI(prompt, image, response_format=None, max_tokens=500):
+  """
+  Ask GPT-4o a question about an image.
+
+  Args:
+      prompt (str): Question or instruction about the image
+      image (PIL.Image.Image): Image to analyse
+      response_format (dict, optional): OpenAI response_format, e.g. a JSON schema
+      max_tokens (int, optional): Maximum length of the answer. Defaults to 500.
 
-  # Convert the image to base64
-  buffered = io.BytesIO()
-  image.save(buffered, format="PNG")
-  image_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
+  Returns:
+      str: The answer, or an apology if the request failed
+  """
+  client = llm_api.get_OpenAI()
+  extra_args = {"response_format": response_format} if response_format else {}
 
   try:
       response = client.chat.completions.create(
           model="gpt-4o",
-          messages=[
-              {
-                  "role": "user",
-                  "content": [
-                      {"type": "text", "text": prompt},
-                      {
-                          "type": "image_url",
-                          "image_url": {
-                              "url": f"data:image/png;base64,{image_base64}"
-                          }
-                      }
-                  ]
-              }
-          ],
-          max_tokens=500
+          messages=_image_messages(prompt, image),
+          max_tokens=max_tokens,
+          **extra_args
       )
-      return response.choices[0].message.content if response.choices[0].message.content else "I'm sorry, I couldn't analyze the image. Please try again."
+      return response.choices[0].message.content if response.choices[0].message.content else IMAGE_ANALYSIS_FAILED
     
   except Exception as e:
-    return "I'm sorry, I couldn't analyze the image. Please try again."
-
-def initialize_langchain():
-  client = get_OpenAI()
-  memory = ConversationBufferMemory(size=4)
-  buffer_chain = ConversationChain(llm=get_OpenAI(), memory=memory, verbose = True)
-  return {
-      "client": client,
-      "memory": memory,
-      "buffer_chain": buffer_chain
-  }
+    return IMAGE_ANALYSIS_FAILED
+
+def stream_imageOpenAI(prompt, image, max_tokens=500):
+  """
+  Ask GPT-4o a question about an image and stream the answer as it is generated.
+
+  Args:
+      prompt (str): Question or instruction about the image
+      image (PIL.Image.Image): Image to analyse
+      max_tokens (int, optional): Maximum length of the answer. Defaults to 500.
+
+  Yields:
+      str: Successive pieces of the answer. If the request fails, IMAGE_ANALYSIS_FAILED
+           is yielded (after a blank line when part of the answer was already sent)
+  """
+  client = llm_api.get_OpenAI()
+
+  received = False
+  try:
+      stream = client.chat.completions.create(
+          model="gpt-4o",
+          messages=_image_messages(prompt, image),
+          max_tokens=max_tokens,
+          stream=True
+      )
+      for chunk in stream:
+          text = chunk.choices[0].delta.content if chunk.choices else None
+          if text:
+              received = True
+              yield text
+
+  except Exception:
+    yield f"\n\n{IMAGE_ANALYSIS_FAILED}" if received else IMAGE_ANALYSIS_FAILED
+    return
+
+  if not received:
+    yield IMAGE_ANALYSIS_FAILED
+
+def _image_messages(prompt, image):
+  """Build the chat messages asking prompt about image, with the image inlined as a prepared data URL."""
+  # Downscaled, compressed and memoized data URL of the image
+  image_url = prepare_image(image)
+  return [
+      {
+          "role": "user",
+          "content": [
+              {"type": "text", "text": prompt},
+              {
+                  "type": "image_url",
+                  "image_url": {
+                      "url": image_url
+                  }
+              }
+          ]
+      }
+  ]
+
+_EXIF_ORIENTATION = 0x0112
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+_image_payloads = OrderedDict()
+_image_payloads_lock = threading.Lock()
+
+def prepare_image(image, max_edge=VISION_IMAGE_MAX_EDGE, image_format=VISION_IMAGE_FORMAT, quality=VISION_IMAGE_QUALITY):
+    """
+    Prepare an image for the vision model as a compact base64 data URL.
+
+    Args:
+        image (PIL.Image.Image): Uploaded or captured image
+        max_edge (int, optional): Longest edge in pixels after downscaling
+        image_format (str, optional): "JPEG" or "WEBP"
+        quality (int, optional): Encoder quality, 1-95
+
+    Returns:
+        str: data URL of the encoded image
+
+    Fixes the EXIF orientation, flattens transparency onto white, shrinks the
+    image to max_edge and encodes it lossily. Payloads are memoized per image
+    content hash in a small LRU, so asking several questions about the same
+    image encodes it only once.
+    """
+    cache_key = (_image_hash(image), max_edge, image_format, quality)
+    with _image_payloads_lock:
+        payload = _image_payloads.get(cache_key)
+        if payload is not None:
+            _image_payloads.move_to_end(cache_key)
+            return payload
+
+    prepared = ImageOps.exif_transpose(image)
+    if prepared.mode != "RGB":
+        prepared = prepared.convert("RGBA")
+        background = Image.new("RGB", prepared.size, (255, 255, 255))
+        background.paste(prepared, mask=prepared.getchannel("A"))
+        prepared = background
+    prepared.thumbnail((max_edge, max_edge))
+
+    buffered = io.BytesIO()
+    prepared.save(buffered, format=image_format, quality=quality, optimize=True)
+    payload = f"data:{_MIME_TYPES[image_format]};base64,{base64.b64encode(buffered.getvalue()).decode('utf-8')}"
+
+    with _image_payloads_lock:
+        _image_payloads[cache_key] = payload
+        while len(_image_payloads) > VISION_PAYLOAD_CACHE_MAX_ENTRIES:
+            _image_payloads.popitem(last=False)
+    return payload
+
+_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90
+}
+
+def perceptual_hash(image) -> str:
+    """
+    Compute the difference hash (dHash) of an image.
+
+    Args:
+        image (PIL.Image.Image): Image to hash
+
+    Returns:
+        str: 64-bit hash as 16 hex characters
+
+    Compares the brightness of neighbouring pixels on a 9x8 grayscale
+    version of the upright image. Re-encoded, resized or recompressed copies
+    of the same photo get the same hash, unlike with a content hash.
+    """
+    small = image.convert("L").resize((64, 64), Image.Resampling.LANCZOS, reducing_gap=2.0)
+    transpose = _ORIENTATION_TRANSPOSE.get(image.getexif().get(_EXIF_ORIENTATION, 1))
+    if transpose is not None:
+        small = small.transpose(transpose)
+    pixels = list(small.resize((9, 8), Image.Resampling.LANCZOS).getdata())
+
+    bits = 0
+    for row in range(8):
+        for column in range(8):
+            bits = bits * 2 + (pixels[row * 9 + column] > pixels[row * 9 + column + 1])
+    return f"{bits:016x}"
+
+def _image_hash(image) -> str:
+    """
+    Hash the pixels, size, mode and EXIF orientation of an image.
+
+    Args:
+        image (PIL.Image.Image): Image to hash
+
+    Returns:
+        str: SHA-256 hex digest identifying the image content
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}:{image.size}:{image.getexif().get(_EXIF_ORIENTATION, 1)}".encode('utf-8'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
 
 def get_random_food_fact():
   return random.choice(food_facts)
@@ -71,3 +208,42 @@ def preprocess_restaurant_name(name):
     return re.sub(r'^\d+\.\s*', '', name).strip()
 
 
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat, lon, precision=6):
+    """
+    Encode coordinates as a geohash, a grid cell id that gets finer with each character.
+
+    Args:
+        lat (float): Latitude coordinate
+        lon (float): Longitude coordinate
+        precision (int, optional): Number of characters, 6 is a cell of about 1.2km x 0.6km
+
+    Returns:
+        str: Geohash of the cell containing the coordinates
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even_bit = True
+
+    while len(geohash) < precision:
+        value, value_range = (lon, lon_range) if even_bit else (lat, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            value_range[0] = mid
+        else:
+            bits = bits * 2
+            value_range[1] = mid
+
+        even_bit = not even_bit
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(geohash)